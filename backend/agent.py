@@ -1,37 +1,45 @@
 from langchain_groq import ChatGroq
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferMemory
-from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from langchain import hub
-from typing import List, Dict
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.load import dumps, loads
+from langchain.prompts import PromptTemplate
+from langchain.tools import Tool
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
 from config import settings
 from models import ChatMessage
-from mcp_agent import MCPToolWrapper
+from mcp_agent import MCPToolWrapper, is_cacheable_tool_call
+from http_client import get_async_client
 
+logger = logging.getLogger(__name__)
 
-class MooAgent:
-    """AI Agent powered by Groq and LangChain."""
-    
-    def __init__(self, model: str = None):
-        """Initialize the MooAgent with optional model selection.
-        
-        Args:
-            model: Model ID to use. If None, uses default from settings.
-        """
-        self.current_model = model or settings.default_model
-        self.llm = self._initialize_llm(self.current_model)
-        
-        # Define tools for the agent
-        self.tools = self._create_tools()
+SYSTEM_PROMPT = """You are MooAgent, an AI-powered personal assistant designed to help with daily work tasks.
         
-        # Get the react prompt template
-        # This is the standard ReAct prompt from LangChain hub
-        try:
-            prompt = hub.pull("hwchase17/react-chat")
-        except:
-            # Fallback to a custom prompt if hub is not accessible
-            from langchain.prompts import PromptTemplate
-            template = """You are a helpful AI assistant with access to tools.
+Your capabilities include:
+- Answering questions and providing information
+- Helping with task planning and organization
+- Providing guidance and advice
+- Assisting with various work-related queries
+
+You are friendly, helpful, and professional. Always aim to provide clear, concise, and actionable responses.
+If you're unsure about something, be honest and suggest alternatives."""
+
+# Local ReAct template used when the LangChain hub is unreachable.
+# Static prefix first (system prompt, tools, format rules) so it stays
+# byte-identical across turns and the provider can reuse its prompt cache.
+# Only chat history, input and scratchpad vary, and they come last.
+_FALLBACK_PROMPT = PromptTemplate(
+    template=SYSTEM_PROMPT + """
 
 TOOLS:
 ------
@@ -66,22 +74,153 @@ Previous conversation:
 
 User: {input}
 
-{agent_scratchpad}"""
-            
-            prompt = PromptTemplate(
-                template=template,
-                input_variables=["input", "chat_history", "agent_scratchpad", "tools", "tool_names"]
-            )
+{agent_scratchpad}""",
+    input_variables=["input", "chat_history", "agent_scratchpad", "tools", "tool_names"]
+)
+
+# Marker the ReAct format puts in front of the user-facing reply
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# Output AgentExecutor substitutes when it hits max_iterations/max_execution_time
+_STOPPED_OUTPUT_PREFIX = "Agent stopped due to"
+
+# Tools whose observations never change the answer over time
+_CACHEABLE_TOOLS = frozenset({"AssistantHelper", "_Exception"})
+
+# Speaker labels for chat_history; system messages are not replayed
+_HISTORY_LABELS = {"user": "Human", "assistant": "Assistant"}
+
+# Hub prompts are persisted locally so restarts skip the network fetch
+PROMPT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mooagent", "react_prompt.json")
+PROMPT_CACHE_MAX_AGE = 7 * 24 * 3600  # one week
+
+
+def _is_cacheable_result(result: Dict) -> bool:
+    """Whether an executor result can be served again from the response cache.
+    
+    Replies that used time/uuid (or other non-idempotent) MCP tools, failed
+    tool calls, or the executor's iteration-limit fallback are not cached.
+    """
+    output = result.get("output")
+    if not isinstance(output, str) or not output or output.startswith(_STOPPED_OUTPUT_PREFIX):
+        return False
+    for action, observation in result.get("intermediate_steps", ()):
+        if action.tool == "MCPRemoteTool":
+            if not is_cacheable_tool_call(str(action.tool_input), observation):
+                return False
+        elif action.tool not in _CACHEABLE_TOOLS:
+            return False
+    return True
+
+
+def is_model_decommissioned(error: Exception) -> bool:
+    """Whether an LLM error says the selected model has been retired."""
+    error_msg = str(error)
+    return "model_decommissioned" in error_msg or "has been decommissioned" in error_msg
+
+
+def _read_cached_prompt():
+    """Load the hub prompt saved on disk, if present and fresh."""
+    try:
+        if time.time() - os.path.getmtime(PROMPT_CACHE_PATH) > PROMPT_CACHE_MAX_AGE:
+            return None
+        with open(PROMPT_CACHE_PATH, "r", encoding="utf-8") as f:
+            return loads(f.read())
+    except Exception:
+        return None
+
+
+def _write_cached_prompt(prompt):
+    """Save the hub prompt to disk atomically; failures are not fatal."""
+    try:
+        os.makedirs(os.path.dirname(PROMPT_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{PROMPT_CACHE_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(dumps(prompt))
+        os.replace(tmp_path, PROMPT_CACHE_PATH)
+    except Exception as e:
+        logger.debug("Could not cache ReAct prompt on disk: %s", e)
+
+
+@functools.lru_cache(maxsize=1)
+def get_react_prompt():
+    """Return the ReAct prompt, resolved once per process.
+    
+    Order: on-disk copy of the hub prompt, LangChain hub, built-in template.
+    """
+    prompt = _read_cached_prompt()
+    if prompt is not None:
+        return prompt
+    
+    # Get the react prompt template
+    # This is the standard ReAct prompt from LangChain hub
+    try:
+        prompt = hub.pull("hwchase17/react-chat")
+    except Exception:
+        # Fallback to a custom prompt if hub is not accessible
+        return _FALLBACK_PROMPT
+    
+    _write_cached_prompt(prompt)
+    return prompt
+
+
+class PromptCacheUsageHandler(BaseCallbackHandler):
+    """Log prompt and cached-prefix token counts reported by Groq."""
+    
+    def on_llm_end(self, response: LLMResult, **kwargs) -> None:
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens", 0)
+        details = token_usage.get("prompt_tokens_details") or {}
+        cached_tokens = details.get("cached_tokens", 0)
+        # Groq reports cache reads only; there is no cache-write figure
+        logger.debug(
+            "🧮 Prompt tokens: %d (cached: %d, hit ratio: %.0f%%)",
+            prompt_tokens, cached_tokens, 100.0 * cached_tokens / prompt_tokens if prompt_tokens else 0.0
+        )
+
+
+class MooAgent:
+    """AI Agent powered by Groq and LangChain."""
+    
+    _cached_tools: Optional[List] = None
+    
+    def __init__(self, model: str = None):
+        """Initialize the MooAgent with optional model selection.
+        
+        Args:
+            model: Model ID to use. If None, uses default from settings.
+        """
+        self.current_model = model or settings.default_model
+        self.llm = self._initialize_llm(self.current_model)
+        
+        # LRU response cache: key -> (expires_at, response)
+        self._response_cache: OrderedDict = OrderedDict()
+        
+        # Caps concurrent agent runs so bursts queue here instead of
+        # tripping Groq's rate limits
+        self._llm_semaphore = asyncio.Semaphore(settings.max_concurrent_llm_calls)
         
+        # Tools and prompt don't depend on the model, so they are built once
+        # per process and reused across instances and model switches
+        if MooAgent._cached_tools is None:
+            MooAgent._cached_tools = self._create_tools()
+        self.tools = MooAgent._cached_tools
+        
+        self.prompt = get_react_prompt()
+        
+        self.agent = self._build_executor()
+    
+    def _build_executor(self) -> AgentExecutor:
+        """Create the ReAct agent executor for the current LLM."""
         # Create the agent
         agent = create_react_agent(
             llm=self.llm,
             tools=self.tools,
-            prompt=prompt
+            prompt=self.prompt
         )
         
         # Create the agent executor with better error handling
-        self.agent = AgentExecutor(
+        return AgentExecutor(
             agent=agent,
             tools=self.tools,
             verbose=settings.debug,
@@ -106,20 +245,23 @@ User: {input}
             llm = ChatGroq(
                 model=model,
                 temperature=0.7,
-                groq_api_key=settings.groq_api_key
+                groq_api_key=settings.groq_api_key,
+                http_async_client=get_async_client(),
+                callbacks=[PromptCacheUsageHandler()] if settings.debug else None
             )
-            print(f"✅ Initialized Groq LLM with model: {model}")
+            logger.info("✅ Initialized Groq LLM with model: %s", model)
             return llm
         except Exception as e:
-            print(f"⚠️  Warning: Could not initialize {model}, trying fallback: {e}")
+            logger.warning("⚠️  Could not initialize %s, trying fallback: %s", model, e)
             # Fallback to the fastest model
             fallback_model = "llama-3.1-8b-instant"
             llm = ChatGroq(
                 model=fallback_model,
                 temperature=0.7,
-                groq_api_key=settings.groq_api_key
+                groq_api_key=settings.groq_api_key,
+                http_async_client=get_async_client()
             )
-            print(f"✅ Using fallback model: {fallback_model}")
+            logger.info("✅ Using fallback model: %s", fallback_model)
             return llm
     
     def set_model(self, model: str):
@@ -128,21 +270,20 @@ User: {input}
         Args:
             model: Model ID to switch to
         """
-        print(f"🔄 Switching model from {self.current_model} to {model}")
+        logger.info("🔄 Switching model from %s to %s", self.current_model, model)
         self.current_model = model
         self.llm = self._initialize_llm(model)
-        # Reinitialize the agent with the new LLM
-        self.__init__(model=model)
-        print(f"✅ Model switched successfully to {model}")
+        # Rebuild only the executor; prompt and tools are reused
+        self.agent = self._build_executor()
+        logger.info("✅ Model switched successfully to %s", model)
     
     def _create_tools(self) -> List:
         """Create tools for the agent."""
-        from langchain.tools import Tool
-        
         tools = [
             Tool(
                 name="AssistantHelper",
                 func=self._assistant_helper,
+                coroutine=self._aassistant_helper,
                 description="A helpful assistant that can help with various daily work tasks, answer questions, and provide information."
             )
         ]
@@ -161,18 +302,20 @@ User: {input}
 - UUID: Generate unique identifiers
 - Adobe Regions: Get Adobe region names for cloud regions
 
-Input should be a natural language description of what you want to do."""
+Input should be a natural language description of what you want to do.
+For several independent requests, put each on its own line; they run together."""
                 
                 tools.append(
                     Tool(
                         name="MCPRemoteTool",
                         func=mcp_wrapper.call_mcp_tool,
+                        coroutine=mcp_wrapper.acall_mcp_tool,
                         description=tool_description
                     )
                 )
-                print(f"✅ MCP sub-agent initialized with server: {settings.mcp_server_url}")
+                logger.info("✅ MCP sub-agent initialized with server: %s", settings.mcp_server_url)
             except Exception as e:
-                print(f"⚠️  Warning: Could not initialize MCP sub-agent: {e}")
+                logger.warning("⚠️  Could not initialize MCP sub-agent: %s", e)
         
         return tools
     
@@ -181,10 +324,82 @@ Input should be a natural language description of what you want to do."""
         # For simple queries that don't need external tools
         return f"I can help you with: {query}. Let me know if you need specific calculations, weather info, time, or UUID generation - I have tools for those!"
     
+    async def _aassistant_helper(self, query: str) -> str:
+        """Async assistant helper so the agent doesn't hop to a thread pool."""
+        return self._assistant_helper(query)
+    
+    def _cache_key(self, message: str, chat_history: str) -> str:
+        """Build a response cache key from the model, prompt, history and message."""
+        payload = json.dumps(
+            [self.current_model, self.get_system_prompt(), chat_history, message]
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Return a cached response if present and not expired."""
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return response
+    
+    def _cache_set(self, key: str, response: str):
+        """Store a response, evicting the least recently used entries."""
+        if settings.response_cache_size <= 0:
+            return
+        self._response_cache[key] = (time.monotonic() + settings.response_cache_ttl, response)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > settings.response_cache_size:
+            self._response_cache.popitem(last=False)
+    
+    def _trim_history(self, history: Optional[List[ChatMessage]], max_tokens: Optional[int] = None) -> List[ChatMessage]:
+        """Drop the oldest messages until the history fits the token budget.
+        
+        Token counts are estimated as ~4 characters per token.
+        
+        Args:
+            history: Conversation history, oldest first
+            max_tokens: Budget in tokens. If None, uses settings.max_history_tokens.
+        
+        Returns:
+            The most recent messages that fit, oldest first
+        """
+        if not history:
+            return []
+        budget = settings.max_history_tokens if max_tokens is None else max_tokens
+        
+        kept = []
+        for msg in reversed(history):
+            cost = len(msg.content) // 4 + 4  # +4 for role/formatting overhead
+            if cost > budget:
+                break
+            budget -= cost
+            kept.append(msg)
+        kept.reverse()
+        return kept
+    
+    @staticmethod
+    def _format_history(history: List[ChatMessage]) -> str:
+        """Render user/assistant turns as the prompt's chat_history string."""
+        return "".join(
+            f"{_HISTORY_LABELS[msg.role]}: {msg.content}\n"
+            for msg in history
+            if msg.role in _HISTORY_LABELS
+        )
+    
     def chat(self, message: str, conversation_history: List[ChatMessage] = None) -> str:
         """
         Process a chat message and return a response.
         
+        For callers without an event loop. Uses the executor's sync `invoke`:
+        ChatGroq goes through its own sync client and the MCP tool runs on
+        its background loop, so the shared async clients (bound to the app's
+        loop) are never used from a throwaway loop.
+        
         Args:
             message: The user's message
             conversation_history: Optional list of previous messages
@@ -193,85 +408,200 @@ Input should be a natural language description of what you want to do."""
             The agent's response
         """
         try:
-            # Convert conversation history to LangChain format
-            messages = []
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Keep last 10 messages for context
-                    if msg.role == "system":
-                        messages.append(SystemMessage(content=msg.content))
-                    elif msg.role == "user":
-                        messages.append(HumanMessage(content=msg.content))
-                    elif msg.role == "assistant":
-                        messages.append(AIMessage(content=msg.content))
-            
-            # Add current message
-            messages.append(HumanMessage(content=message))
-            
-            # Always use the agent (even for first message) to enable tool usage
-            # Build chat history string
-            chat_history = ""
-            if conversation_history:
-                for msg in conversation_history:
-                    if msg.role == "user":
-                        chat_history += f"Human: {msg.content}\n"
-                    elif msg.role == "assistant":
-                        chat_history += f"Assistant: {msg.content}\n"
+            chat_history, cache_key = self._prepare_run(message, conversation_history)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("⚡ Response cache hit for query: %.50s", message)
+                return cached
             
-            print(f"\n{'='*60}")
-            print(f"🤖 Agent Processing Query: {message}")
-            print(f"📚 Conversation History Length: {len(conversation_history) if conversation_history else 0}")
-            print(f"{'='*60}\n")
-            
-            # Use invoke with the new agent executor
             response = self.agent.invoke({
                 "input": message,
                 "chat_history": chat_history
             })
+            return self._finish_run(cache_key, response)
             
-            print(f"\n{'='*60}")
-            print(f"📊 Agent Response Object Type: {type(response)}")
-            print(f"📊 Agent Response Keys: {response.keys() if isinstance(response, dict) else 'N/A'}")
-            
-            if isinstance(response, dict) and 'intermediate_steps' in response:
-                print(f"🔧 Tool Usage Steps: {len(response['intermediate_steps'])}")
-                for i, (action, observation) in enumerate(response['intermediate_steps'], 1):
-                    print(f"\n  Step {i}:")
-                    print(f"    Tool: {action.tool}")
-                    print(f"    Input: {action.tool_input[:100]}...")
-                    print(f"    Output: {str(observation)[:200]}...")
-            
-            print(f"{'='*60}\n")
-            
-            # Extract the output from the response
-            if isinstance(response, dict):
-                response = response.get("output", str(response))
-            else:
-                response = str(response)
+        except Exception as e:
+            # Traceback formatting only happens in debug mode
+            logger.error("AGENT ERROR: Error processing message: %s", e, exc_info=settings.debug)
+            if settings.debug:
+                raise
+            return f"I apologize, but I encountered an error: {str(e)}. Please check your API configuration."
+    
+    async def achat(self, message: str, conversation_history: List[ChatMessage] = None) -> str:
+        """
+        Process a chat message asynchronously and return a response.
+        
+        Args:
+            message: The user's message
+            conversation_history: Optional list of previous messages
+        
+        Returns:
+            The agent's response
+        """
+        try:
+            chat_history, cache_key = self._prepare_run(message, conversation_history)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("⚡ Response cache hit for query: %.50s", message)
+                return cached
             
-            return response
+            # Use ainvoke so the Groq round-trip doesn't block the event loop
+            async with self._llm_semaphore:
+                response = await self.agent.ainvoke({
+                    "input": message,
+                    "chat_history": chat_history
+                })
+            return self._finish_run(cache_key, response)
             
         except Exception as e:
-            error_msg = f"Error processing message: {str(e)}"
-            print(f"AGENT ERROR: {error_msg}")
-            import traceback
-            traceback.print_exc()
+            # Traceback formatting only happens in debug mode
+            logger.error("AGENT ERROR: Error processing message: %s", e, exc_info=settings.debug)
             if settings.debug:
                 raise
             return f"I apologize, but I encountered an error: {str(e)}. Please check your API configuration."
     
+    def _prepare_run(self, message: str, conversation_history: Optional[List[ChatMessage]]) -> Tuple[str, str]:
+        """Return the chat_history string and response cache key for a run."""
+        # Keep only the most recent turns that fit the token budget
+        history = self._trim_history(conversation_history)
+        
+        # Always use the agent (even for first message) to enable tool usage
+        # Build chat history string
+        chat_history = self._format_history(history)
+        
+        logger.debug(
+            "🤖 Agent Processing Query: %s (history: %d of %d messages)",
+            message, len(history), len(conversation_history) if conversation_history else 0
+        )
+        return chat_history, self._cache_key(message, chat_history)
+    
+    def _finish_run(self, cache_key: str, response) -> str:
+        """Extract the reply from an executor result, caching it when safe to reuse."""
+        # Only build the step dump when debug logging is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "📊 Agent Response Object Type: %s, Keys: %s",
+                type(response), response.keys() if isinstance(response, dict) else "N/A"
+            )
+            if isinstance(response, dict) and 'intermediate_steps' in response:
+                logger.debug("🔧 Tool Usage Steps: %d", len(response['intermediate_steps']))
+                for i, (action, observation) in enumerate(response['intermediate_steps'], 1):
+                    logger.debug(
+                        "  Step %d: Tool: %s | Input: %.100s | Output: %.200s",
+                        i, action.tool, action.tool_input, observation
+                    )
+        
+        # Extract the output from the response
+        if isinstance(response, dict):
+            output = response.get("output", str(response))
+            if _is_cacheable_result(response):
+                self._cache_set(cache_key, output)
+        else:
+            output = str(response)
+        return output
+    
+    async def astream_chat(self, message: str, conversation_history: List[ChatMessage] = None) -> AsyncIterator[str]:
+        """
+        Process a chat message and yield the final answer as it is generated.
+        
+        Tool-use steps (Thought/Action/Observation) are not streamed; only
+        text after the "Final Answer:" marker is forwarded to the caller.
+        
+        Args:
+            message: The user's message
+            conversation_history: Optional list of previous messages
+        
+        Yields:
+            Chunks of the agent's response
+        """
+        history = self._trim_history(conversation_history)
+        chat_history = self._format_history(history)
+        
+        cache_key = self._cache_key(message, chat_history)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.debug("⚡ Response cache hit for query: %.50s", message)
+            yield cached
+            return
+        
+        # Per LLM run: accumulated text and how much of the answer was sent
+        buffers: Dict[str, str] = {}
+        sent: Dict[str, int] = {}
+        streamed = False
+        output = None
+        cacheable = False
+        
+        try:
+            async with self._llm_semaphore:
+                async for event in self.agent.astream_events(
+                    {"input": message, "chat_history": chat_history},
+                    version="v2"
+                ):
+                    kind = event["event"]
+                    if kind == "on_chain_end" and not event.get("parent_ids"):
+                        # Top-level executor finished
+                        result = event["data"].get("output")
+                        if isinstance(result, dict):
+                            output = result.get("output")
+                            cacheable = _is_cacheable_result(result)
+                        continue
+                    if kind != "on_chat_model_stream":
+                        continue
+                    
+                    run_id = event["run_id"]
+                    text = buffers.get(run_id, "") + (event["data"]["chunk"].content or "")
+                    buffers[run_id] = text
+                    idx = text.find(FINAL_ANSWER_MARKER)
+                    if idx == -1:
+                        continue
+                    
+                    answer = text[idx + len(FINAL_ANSWER_MARKER):]
+                    if run_id not in sent:
+                        stripped = answer.lstrip()
+                        if not stripped:
+                            continue
+                        sent[run_id] = len(answer) - len(stripped)
+                    chunk = answer[sent[run_id]:]
+                    sent[run_id] = len(answer)
+                    if chunk:
+                        streamed = True
+                        yield chunk
+        except Exception as e:
+            if is_model_decommissioned(e):
+                # The caller reports this as an error so the user picks another model
+                raise
+            logger.error("AGENT ERROR: Error streaming message: %s", e, exc_info=settings.debug)
+            yield f"I apologize, but I encountered an error: {str(e)}. Please check your API configuration."
+            return
+        
+        # No "Final Answer:" was streamed (e.g. parsing-error recovery);
+        # fall back to the executor's final output in one piece
+        if not streamed and output:
+            yield output
+        if cacheable:
+            self._cache_set(cache_key, output)
+    
     def get_system_prompt(self) -> str:
         """Get the system prompt for the agent."""
-        return """You are MooAgent, an AI-powered personal assistant designed to help with daily work tasks.
-        
-Your capabilities include:
-- Answering questions and providing information
-- Helping with task planning and organization
-- Providing guidance and advice
-- Assisting with various work-related queries
+        return SYSTEM_PROMPT
 
-You are friendly, helpful, and professional. Always aim to provide clear, concise, and actionable responses.
-If you're unsure about something, be honest and suggest alternatives."""
 
+_moo_agent: Optional[MooAgent] = None
+_moo_agent_lock = threading.Lock()
 
-# Global agent instance
-moo_agent = MooAgent()
+
+def get_moo_agent() -> MooAgent:
+    """Return the process-wide MooAgent, constructing it on first use.
+    
+    Construction pulls the prompt and initializes the LLM and MCP tools,
+    so it is deferred until a request needs the agent instead of running
+    at import time. FastAPI resolves this sync dependency in its threadpool,
+    so construction is locked: concurrent first requests must share one
+    agent (and with it one LLM concurrency semaphore).
+    """
+    global _moo_agent
+    if _moo_agent is None:
+        with _moo_agent_lock:
+            if _moo_agent is None:
+                _moo_agent = MooAgent()
+    return _moo_agent
@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict, Tuple
+import asyncio
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -14,14 +17,76 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # In-memory user storage (replace with database in production)
-users_db = {}
+# Users are stored as ready-to-return frozen models; password hashes are
+# kept in a separate table so they never travel with the User object
+users_db: Dict[str, User] = {}
+password_hashes: Dict[str, str] = {}
+
+# Short-lived cache of successful verifications: digest -> expiry (monotonic)
+# Only successes are cached so failed attempts always pay the full bcrypt cost
+VERIFY_CACHE_TTL = 60
+VERIFY_CACHE_MAXSIZE = 4096
+_verify_cache: Dict[bytes, float] = {}
+
+# Decoded JWTs: token -> (expiry as unix time, token data)
+# Entries never outlive the token's own "exp" claim
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAXSIZE = 8192
+_token_cache: Dict[str, Tuple[float, TokenData]] = {}
+
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    """Digest identifying a (password, hash) pair in the verification cache."""
+    return hashlib.sha256(f"{plain_password}\0{hashed_password}".encode("utf-8")).digest()
+
+
+def _is_recently_verified(key: bytes) -> bool:
+    """Check whether a verification for this key succeeded within the TTL."""
+    expires_at = _verify_cache.get(key)
+    return expires_at is not None and expires_at > time.monotonic()
+
+
+def _remember_verified(key: bytes):
+    """Record a successful verification, evicting old entries when full."""
+    now = time.monotonic()
+    if len(_verify_cache) >= VERIFY_CACHE_MAXSIZE:
+        # Drop expired entries first, then the oldest if still full
+        for stale in [k for k, exp in _verify_cache.items() if exp <= now]:
+            del _verify_cache[stale]
+        if len(_verify_cache) >= VERIFY_CACHE_MAXSIZE:
+            del _verify_cache[next(iter(_verify_cache))]
+    _verify_cache[key] = now + VERIFY_CACHE_TTL
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
     # Apply same truncation as when hashing
     plain_password = truncate_password(plain_password, 72)
-    return pwd_context.verify(plain_password, hashed_password)
+    
+    key = _verify_cache_key(plain_password, hashed_password)
+    if _is_recently_verified(key):
+        return True
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False
+    _remember_verified(key)
+    return True
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop.
+    
+    The bcrypt check runs in a worker thread; the cache is only touched
+    from the event loop thread.
+    """
+    plain_password = truncate_password(plain_password, 72)
+    
+    key = _verify_cache_key(plain_password, hashed_password)
+    if _is_recently_verified(key):
+        return True
+    if not await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password):
+        return False
+    _remember_verified(key)
+    return True
 
 
 def truncate_password(password: str, max_bytes: int = 72) -> str:
@@ -29,6 +94,10 @@ def truncate_password(password: str, max_bytes: int = 72) -> str:
     Truncate password to fit within max_bytes when encoded as UTF-8.
     Ensures we don't cut in the middle of a multi-byte character.
     """
+    # ASCII fast path: one byte per char, so the length check is exact
+    if password.isascii() and len(password) <= max_bytes:
+        return password
+    
     password_bytes = password.encode('utf-8')
     if len(password_bytes) <= max_bytes:
         return password
@@ -42,11 +111,14 @@ def get_password_hash(password: str) -> str:
     """Hash a password."""
     # Bcrypt has a 72 byte limit
     password = truncate_password(password, 72)
-    print(f"DEBUG: Password length: {len(password)} chars, {len(password.encode('utf-8'))} bytes")
-    print(f"DEBUG: Password: {password[:20]}..." if len(password) > 20 else f"DEBUG: Password: {password}")
     return pwd_context.hash(password)
 
 
+async def aget_password_hash(password: str) -> str:
+    """Hash a password in a worker thread without blocking the event loop."""
+    return await asyncio.to_thread(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -69,14 +141,33 @@ def decode_access_token(token: str) -> TokenData:
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        expires_at, token_data = cached
+        if expires_at > now:
+            return token_data
+        del _token_cache[token]
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        return TokenData(email=email)
+        token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
+    
+    expires_at = min(now + TOKEN_CACHE_TTL, payload.get("exp", now))
+    if expires_at > now:
+        if len(_token_cache) >= TOKEN_CACHE_MAXSIZE:
+            # Drop expired entries first, then the oldest if still full
+            for stale in [t for t, (exp, _) in _token_cache.items() if exp <= now]:
+                del _token_cache[stale]
+            if len(_token_cache) >= TOKEN_CACHE_MAXSIZE:
+                del _token_cache[next(iter(_token_cache))]
+        _token_cache[token] = (expires_at, token_data)
+    return token_data
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
@@ -84,43 +175,27 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     token = credentials.credentials
     token_data = decode_access_token(token)
     
-    user_data = users_db.get(token_data.email)
-    if user_data is None:
+    user = users_db.get(token_data.email)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # Return User without hashed_password
-    return User(
-        id=user_data["id"],
-        email=user_data["email"],
-        full_name=user_data.get("full_name"),
-        created_at=user_data["created_at"],
-        is_active=user_data["is_active"]
-    )
+    return user
 
 
-def authenticate_user(email: str, password: str) -> Optional[User]:
+async def authenticate_user(email: str, password: str) -> Optional[User]:
     """Authenticate a user with email and password."""
-    user_data = users_db.get(email)
-    if not user_data:
+    hashed_password = password_hashes.get(email)
+    if hashed_password is None:
         return None
-    if not verify_password(password, user_data["hashed_password"]):
+    if not await averify_password(password, hashed_password):
         return None
-    
-    # Return User without hashed_password
-    return User(
-        id=user_data["id"],
-        email=user_data["email"],
-        full_name=user_data.get("full_name"),
-        created_at=user_data["created_at"],
-        is_active=user_data["is_active"]
-    )
+    return users_db[email]
 
 
-def create_user(email: str, password: str, full_name: Optional[str] = None) -> User:
+async def create_user(email: str, password: str, full_name: Optional[str] = None) -> User:
     """Create a new user."""
     if email in users_db:
         raise HTTPException(
@@ -128,23 +203,20 @@ def create_user(email: str, password: str, full_name: Optional[str] = None) -> U
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(password)
-    created_at = datetime.utcnow()
-    user_data = {
-        "id": email,  # Simple ID strategy for demo
-        "email": email,
-        "full_name": full_name,
-        "hashed_password": hashed_password,
-        "created_at": created_at,
-        "is_active": True
-    }
-    users_db[email] = user_data
-    
-    # Return User without hashed_password
-    return User(
-        id=email,
+    hashed_password = await aget_password_hash(password)
+    # Another registration may have completed while hashing
+    if email in users_db:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    user = User(
+        id=email,  # Simple ID strategy for demo
         email=email,
         full_name=full_name,
-        created_at=created_at,
+        created_at=datetime.utcnow(),
         is_active=True
     )
+    password_hashes[email] = hashed_password
+    users_db[email] = user
+    return user
@@ -1,5 +1,43 @@
-from pydantic_settings import BaseSettings
-from typing import List
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cached_property, lru_cache
+from typing import List, Tuple
+import logging
+
+
+# Static model catalog, built once at import
+AVAILABLE_MODELS: Tuple[dict, ...] = (
+    # OpenAI GPT-OSS Models (Groq-hosted, open-weight)
+    {
+        "id": "openai/gpt-oss-120b",
+        "name": "GPT-OSS 120B ⭐",
+        "description": "OpenAI's flagship open model, 500 t/s, browser search & code execution",
+        "context_window": 131072,
+        "provider": "groq"
+    },
+    {
+        "id": "openai/gpt-oss-20b",
+        "name": "GPT-OSS 20B ⚡",
+        "description": "Fast OpenAI model, 1000 t/s, highly efficient",
+        "context_window": 131072,
+        "provider": "groq"
+    },
+    # Meta LLaMA Models (Groq-hosted)
+    {
+        "id": "llama-3.3-70b-versatile",
+        "name": "LLaMA 3.3 70B",
+        "description": "Latest Meta model, 280 t/s",
+        "context_window": 131072,
+        "provider": "groq"
+    },
+    {
+        "id": "llama-3.1-8b-instant",
+        "name": "LLaMA 3.1 8B Instant",
+        "description": "Fastest model, 560 t/s",
+        "context_window": 131072,
+        "provider": "groq"
+    }
+)
 
 
 class Settings(BaseSettings):
@@ -17,64 +55,67 @@ class Settings(BaseSettings):
     app_name: str = "MooAgent"
     app_version: str = "1.0.0"
     debug: bool = False
+    log_level: str = ""  # defaults to DEBUG when debug is on, WARNING otherwise
     
     # CORS Configuration
     allowed_origins: str = "http://localhost:3000"
     
     # MCP Configuration (optional)
     mcp_server_url: str = ""
+    mcp_tools_cache_ttl: int = 60  # seconds; 0 disables the tools list cache
+    mcp_http2: bool = True  # multiplex concurrent MCP calls over one connection
+    
+    # Response Cache Configuration (set size to 0 to disable)
+    response_cache_size: int = 1024
+    response_cache_ttl: int = 300  # seconds
+    
+    # Conversation history budget sent to the LLM (estimated tokens)
+    max_history_tokens: int = 2048
+    
+    # Maximum agent runs in flight against Groq at once (rate-limit guard)
+    max_concurrent_llm_calls: int = 8
     
     # Default Model
     default_model: str = "openai/gpt-oss-120b"  # Groq-hosted OpenAI model
     
+    @field_validator("log_level")
+    @classmethod
+    def _check_log_level(cls, value: str) -> str:
+        """Normalize LOG_LEVEL to an upper-case level name, rejecting unknown names."""
+        value = value.strip().upper()
+        if value and value not in logging.getLevelNamesMapping():
+            raise ValueError(f"Unknown log level '{value}'; use one of DEBUG, INFO, WARNING, ERROR, CRITICAL")
+        return value
+    
     @property
-    def available_models(self) -> List[dict]:
+    def available_models(self) -> Tuple[dict, ...]:
         """List of available models from Groq (including OpenAI GPT-OSS models).
         
         Source: https://console.groq.com/docs/models
         All models run on Groq's ultra-fast infrastructure.
         """
-        return [
-            # OpenAI GPT-OSS Models (Groq-hosted, open-weight)
-            {
-                "id": "openai/gpt-oss-120b",
-                "name": "GPT-OSS 120B ⭐",
-                "description": "OpenAI's flagship open model, 500 t/s, browser search & code execution",
-                "context_window": 131072,
-                "provider": "groq"
-            },
-            {
-                "id": "openai/gpt-oss-20b",
-                "name": "GPT-OSS 20B ⚡",
-                "description": "Fast OpenAI model, 1000 t/s, highly efficient",
-                "context_window": 131072,
-                "provider": "groq"
-            },
-            # Meta LLaMA Models (Groq-hosted)
-            {
-                "id": "llama-3.3-70b-versatile",
-                "name": "LLaMA 3.3 70B",
-                "description": "Latest Meta model, 280 t/s",
-                "context_window": 131072,
-                "provider": "groq"
-            },
-            {
-                "id": "llama-3.1-8b-instant",
-                "name": "LLaMA 3.1 8B Instant",
-                "description": "Fastest model, 560 t/s",
-                "context_window": 131072,
-                "provider": "groq"
-            }
-        ]
+        return AVAILABLE_MODELS
     
-    @property
+    @cached_property
     def cors_origins(self) -> List[str]:
-        """Parse CORS origins from comma-separated string."""
-        return [origin.strip() for origin in self.allowed_origins.split(",")]
+        """Parse CORS origins from comma-separated string (blank entries dropped)."""
+        return [origin.strip() for origin in self.allowed_origins.split(",") if origin.strip()]
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings, parsing the environment once.
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    Use as a FastAPI dependency (`Depends(get_settings)`) so tests can
+    override it; module-level code can use `settings` directly.
+    """
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
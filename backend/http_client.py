@@ -0,0 +1,59 @@
+"""
+Shared HTTP connection pools for outbound calls.
+Reusing tuned AsyncClients amortizes TCP and TLS setup across requests.
+The LLM (Groq) and MCP clients are kept apart so MCP-specific settings
+(HTTP/2, the SSE Accept header, tight timeouts) don't apply to LLM calls.
+"""
+from typing import Optional
+import httpx
+from config import settings
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+_mcp_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient for LLM calls, creating it on first use."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=32,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            follow_redirects=True
+        )
+    return _async_client
+
+
+def get_mcp_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient for MCP calls, creating it on first use."""
+    global _mcp_client
+    if _mcp_client is None or _mcp_client.is_closed:
+        _mcp_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=32,
+                keepalive_expiry=60
+            ),
+            # Small MCP request bodies: fail fast on stalled writes or pool waits
+            timeout=httpx.Timeout(connect=5.0, read=30.0, write=5.0, pool=1.0),
+            follow_redirects=True,
+            http2=settings.mcp_http2,
+            headers={
+                "Accept": "application/json, text/event-stream"
+            }
+        )
+    return _mcp_client
+
+
+async def close_async_client():
+    """Close the shared AsyncClients (called on application shutdown)."""
+    global _async_client, _mcp_client
+    for client in (_async_client, _mcp_client):
+        if client is not None:
+            await client.aclose()
+    _async_client = _mcp_client = None
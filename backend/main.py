@@ -1,9 +1,16 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from datetime import timedelta
 from typing import Dict, Any
+import logging
+import queue
+import uvicorn
+from logging.handlers import QueueHandler, QueueListener
+import orjson
 
-from config import settings
+from config import Settings, settings, get_settings
 from models import (
     UserCreate, UserLogin, User, Token,
     ChatRequest, ChatResponse
@@ -12,46 +19,130 @@ from auth import (
     create_access_token, authenticate_user, create_user,
     get_current_user
 )
-from agent import moo_agent
+from agent import MooAgent, get_moo_agent, is_model_decommissioned
+from mcp_agent import MCPSubAgent, close_background_loop
+from http_client import close_async_client
+
+# Configure logging once at startup (the imported modules don't log at import time)
+logging.basicConfig(
+    level=settings.log_level or ("DEBUG" if settings.debug else "WARNING"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+# httpx logs every outbound request at INFO; keep that out of normal output
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Request handlers only enqueue records; a listener thread does the actual
+# (blocking) writes so logging never stalls the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="AI-powered personal assistant API"
+    description="AI-powered personal assistant API",
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves Server-Sent Events uncompressed.
+    
+    Starlette's gzip stream buffers chunks until its compressor flushes,
+    which would hold back streamed chat tokens.
+    """
+    
+    STREAMING_PATHS = frozenset({"/chat/stream"})
+    
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress larger JSON payloads (model catalog, MCP tool schemas); level 5
+# keeps CPU cost low for most of the size reduction
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Configure CORS (registered right after app creation, before any
+# startup handlers, with origins parsed once into an immutable tuple).
+# With no origins configured the middleware is skipped entirely.
+_CORS_ORIGINS = tuple(settings.cors_origins)
+if _CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=("GET", "POST"),
+        allow_headers=("Authorization", "Content-Type"),
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled outbound HTTP connections and flush queued logs."""
+    await close_async_client()
+    await close_background_loop()
+    _log_listener.stop()
+
+
+# Model IDs a chat request may select
+_VALID_MODEL_IDS = frozenset(model["id"] for model in settings.available_models)
+
+
+def _switch_model(moo_agent: MooAgent, model: str) -> None:
+    """Switch the agent to the requested model, rejecting unknown model IDs."""
+    if model not in _VALID_MODEL_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown model '{model}'. Choose one of the models listed at /agent/models."
+        )
+    logger.debug("🔄 Model switch needed: %s → %s", moo_agent.current_model, model)
+    moo_agent.set_model(model)
+
+
+def _model_unavailable_detail(error: Exception) -> str:
+    """Error detail shown when the selected model has been decommissioned."""
+    return f"The selected model is no longer available. Please choose a different model from the model selector. Error: {error}"
+
+
+# Bodies of the static endpoints, serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "message": f"Welcome to {settings.app_name} API",
+    "version": settings.app_version,
+    "docs": "/docs"
+})
+_HEALTH_BODY = b'{"status":"healthy"}'
+# Static part of /agent/models with the closing brace dropped, so only the
+# current model has to be serialized per request
+_MODELS_BODY_PREFIX = orjson.dumps({
+    "models": settings.available_models,
+    "default_model": settings.default_model
+})[:-1]
 
 
 @app.get("/")
-async def root() -> Dict[str, str]:
+async def root() -> Response:
     """Root endpoint."""
-    return {
-        "message": f"Welcome to {settings.app_name} API",
-        "version": settings.app_version,
-        "docs": "/docs"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Response:
     """Health check endpoint."""
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.post("/auth/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate) -> User:
     """Register a new user."""
     try:
-        user = create_user(
+        user = await create_user(
             email=user_data.email,
             password=user_data.password,
             full_name=user_data.full_name
@@ -62,9 +153,7 @@ async def register(user_data: UserCreate) -> User:
         raise
     except Exception as e:
         # Log and return other errors
-        print(f"Registration error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration error: {str(e)}"
@@ -72,9 +161,12 @@ async def register(user_data: UserCreate) -> User:
 
 
 @app.post("/auth/login", response_model=Token)
-async def login(user_data: UserLogin) -> Token:
+async def login(
+    user_data: UserLogin,
+    settings: Settings = Depends(get_settings)
+) -> Token:
     """Login and get access token."""
-    user = authenticate_user(user_data.email, user_data.password)
+    user = await authenticate_user(user_data.email, user_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -100,7 +192,8 @@ async def get_me(current_user: User = Depends(get_current_user)) -> User:
 @app.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    moo_agent: MooAgent = Depends(get_moo_agent)
 ) -> ChatResponse:
     """
     Chat with the AI agent.
@@ -108,27 +201,23 @@ async def chat(
     This endpoint processes user messages and returns AI-generated responses.
     Optionally accepts a model parameter to use a specific LLM model.
     """
+    # If a model is specified and different from current, switch models
+    if request.model and request.model != moo_agent.current_model:
+        _switch_model(moo_agent, request.model)
+    
     try:
         # Log the incoming request
-        print(f"📨 Chat request from user: {current_user.email}")
-        print(f"📝 Message: {request.message[:50]}..." if len(request.message) > 50 else f"📝 Message: {request.message}")
-        print(f"🤖 Current model: {moo_agent.current_model}")
-        
-        # If a model is specified and different from current, switch models
-        if request.model:
-            print(f"🔍 Requested model: {request.model}")
-            if request.model != moo_agent.current_model:
-                print(f"🔄 Model switch needed: {moo_agent.current_model} → {request.model}")
-                moo_agent.set_model(request.model)
-            else:
-                print(f"✅ Already using requested model: {request.model}")
+        logger.debug(
+            "📨 Chat request from user: %s | 📝 Message: %.50s | 🤖 Current model: %s",
+            current_user.email, request.message, moo_agent.current_model
+        )
         
-        response = moo_agent.chat(
+        response = await moo_agent.achat(
             message=request.message,
             conversation_history=request.conversation_history
         )
         
-        print(f"✅ Response generated successfully")
+        logger.debug("✅ Response generated successfully")
         
         return ChatResponse(
             response=response,
@@ -138,16 +227,14 @@ async def chat(
         error_msg = str(e)
         
         # Check if it's a model decommissioned error
-        if "model_decommissioned" in error_msg or "has been decommissioned" in error_msg:
+        if is_model_decommissioned(e):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"The selected model is no longer available. Please choose a different model from the model selector. Error: {error_msg}"
+                detail=_model_unavailable_detail(e)
             )
         
         # Log the full error for debugging
-        print(f"❌ Chat error: {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Chat error: %s", error_msg)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -155,9 +242,55 @@ async def chat(
         )
 
 
+@app.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    moo_agent: MooAgent = Depends(get_moo_agent)
+) -> StreamingResponse:
+    """
+    Chat with the AI agent and stream the reply as Server-Sent Events.
+    
+    Each event carries a JSON object with a `content` chunk of the final
+    answer; the stream ends with a `[DONE]` event. A decommissioned model
+    gives a 400 before streaming starts, or an `error` event after.
+    """
+    if request.model and request.model != moo_agent.current_model:
+        _switch_model(moo_agent, request.model)
+    
+    stream = moo_agent.astream_chat(
+        message=request.message,
+        conversation_history=request.conversation_history
+    )
+    # Wait for the first chunk before answering, so a decommissioned model
+    # is still reported as a 400 like on /chat
+    try:
+        first_chunk = await anext(stream, None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=_model_unavailable_detail(e)
+        )
+    
+    async def event_stream():
+        try:
+            if first_chunk is not None:
+                yield b"data: " + orjson.dumps({"content": first_chunk}) + b"\n\n"
+            async for chunk in stream:
+                yield b"data: " + orjson.dumps({"content": chunk}) + b"\n\n"
+        except Exception as e:
+            # Too late for a status code; send the detail as an error event
+            yield b"event: error\ndata: " + orjson.dumps({"detail": _model_unavailable_detail(e)}) + b"\n\n"
+            return
+        yield b"data: [DONE]\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.get("/agent/info")
 async def get_agent_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    moo_agent: MooAgent = Depends(get_moo_agent)
 ) -> Dict[str, str]:
     """Get information about the AI agent."""
     return {
@@ -170,23 +303,21 @@ async def get_agent_info(
 
 @app.get("/agent/models")
 async def get_available_models(
-    current_user: User = Depends(get_current_user)
-) -> Dict[str, Any]:
+    current_user: User = Depends(get_current_user),
+    moo_agent: MooAgent = Depends(get_moo_agent)
+) -> Response:
     """Get list of available LLM models."""
-    return {
-        "models": settings.available_models,
-        "current_model": moo_agent.current_model,
-        "default_model": settings.default_model
-    }
+    body = _MODELS_BODY_PREFIX + b',"current_model":' + orjson.dumps(moo_agent.current_model) + b"}"
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/agent/tools")
 async def get_agent_tools(
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    settings: Settings = Depends(get_settings)
 ) -> Dict[str, Any]:
     """Get information about available agent tools including MCP tools."""
-    from typing import Any
-    
     tools_info = {
         "built_in_tools": [
             {
@@ -198,23 +329,22 @@ async def get_agent_tools(
         "mcp_server_url": settings.mcp_server_url or None
     }
     
-    # Get MCP tools if available
+    # Get MCP tools if available (cached server-side, so let clients cache too)
     if settings.mcp_server_url:
         try:
-            from mcp_agent import MCPSubAgent
-            mcp_agent_instance = MCPSubAgent(settings.mcp_server_url)
-            mcp_tools = await mcp_agent_instance.list_tools()
-            tools_info["mcp_tools"] = mcp_tools
-            await mcp_agent_instance.close()
+            async with MCPSubAgent(settings.mcp_server_url) as mcp_agent_instance:
+                tools_info["mcp_tools"] = await mcp_agent_instance.list_tools()
         except Exception as e:
-            print(f"Error fetching MCP tools: {e}")
+            logger.error("Error fetching MCP tools: %s", e)
             tools_info["mcp_error"] = str(e)
+        # Only a successful, non-empty list may be cached by the browser
+        if tools_info["mcp_tools"] and settings.mcp_tools_cache_ttl > 0:
+            response.headers["Cache-Control"] = f"private, max-age={settings.mcp_tools_cache_ttl}"
     
     return tools_info
 
 
 if __name__ == "__main__":
-    import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -2,55 +2,132 @@
 MCP Sub-Agent for connecting to remote Model Context Protocol servers.
 Supports both simple REST-style MCP servers and FastMCP (JSON-RPC over HTTP).
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+import ast
+import asyncio
+import atexit
+import operator
+import re
+import threading
+import time
 import httpx
-import json
+import logging
+import orjson
 from config import settings
+from http_client import get_mcp_client
+
+logger = logging.getLogger(__name__)
+
+# Tools list per MCP server URL: url -> (expires_at, tools). Entries past
+# their expiry are still served while a background refresh runs. The
+# refresh tasks are kept here so they aren't garbage-collected mid-flight
+# and at most one per URL is pending, whichever instance started it.
+_tools_list_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+_tools_refresh_tasks: Dict[str, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# REST endpoints of an MCP server, relative to its base URL
+_REST_METHODS = ("tools/list", "tools/call", "resources/list", "resources/read")
+# Request bodies without parameters, encoded once
+_TOOLS_LIST_JSONRPC_BODY = orjson.dumps({
+    "jsonrpc": "2.0",
+    "method": "tools/list",
+    "params": {},
+    "id": 1
+})
+_STATIC_REST_BODIES = {
+    method: orjson.dumps({"method": method})
+    for method in ("tools/list", "resources/list")
+}
+
+
+def _format_helpx_entry(index: int, result: Dict[str, Any]) -> str:
+    """Format one HelpX search hit as a numbered, multi-line block."""
+    url = result.get("url", "")
+    snippet = result.get("snippet", "")
+    clean_snippet = snippet.strip()
+    if len(clean_snippet) > 200:
+        # Truncate snippet if too long
+        clean_snippet = clean_snippet[:200] + "..."
+    return (
+        f"\n{index}. **{result.get('title', 'No title')}**"
+        + (f"\n   🔗 {url}" if url else "")
+        + f"\n   📊 Relevance: {result.get('score', 0.0):.2f}"
+        + (f"\n   📝 {clean_snippet}" if snippet else "")
+    )
+
+
+class _SSEDecoder:
+    """
+    Incremental Server-Sent Events decoder.
+    
+    Bytes are fed as they arrive; complete events are returned as their
+    joined `data:` payloads. Partial lines are carried over between chunks
+    and scanning resumes where it stopped, so each byte is examined once.
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scan_from = 0
+        self._data: List[bytes] = []
+    
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Add a chunk and return the payloads of all events it completed."""
+        self._buffer += chunk
+        payloads: List[bytes] = []
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", max(start, self._scan_from))
+            if end == -1:
+                break
+            self._line(bytes(self._buffer[start:end]).rstrip(b"\r"), payloads)
+            start = end + 1
+        del self._buffer[:start]
+        self._scan_from = len(self._buffer)
+        return payloads
+    
+    def close(self) -> List[bytes]:
+        """Flush a trailing line and event not terminated by a blank line."""
+        payloads: List[bytes] = []
+        if self._buffer:
+            self._line(bytes(self._buffer).rstrip(b"\r"), payloads)
+            self._buffer.clear()
+        self._line(b"", payloads)
+        return payloads
+    
+    def _line(self, line: bytes, payloads: List[bytes]):
+        if not line:
+            # Blank line: dispatch the event (multiple data lines join with \n)
+            if self._data:
+                payloads.append(b"\n".join(self._data))
+                self._data = []
+        elif line.startswith(b"data:"):
+            value = line[5:]
+            self._data.append(value[1:] if value.startswith(b" ") else value)
 
 
 class MCPSubAgent:
     """Sub-agent for interacting with remote MCP servers."""
     
-    def __init__(self, mcp_url: Optional[str] = None):
+    # Server types confirmed by a probe, per MCP URL (process-wide)
+    _type_cache: Dict[str, str] = {}
+    # Whether a JSON-RPC server answered a batch request, per MCP URL (process-wide)
+    _batch_cache: Dict[str, bool] = {}
+    
+    def __init__(self, mcp_url: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
         """
         Initialize MCP sub-agent.
         
         Args:
             mcp_url: URL of the remote MCP server
+            client: Optional AsyncClient; defaults to the process-wide pool
         """
         self.mcp_url = mcp_url
-        # Configure client to follow redirects and accept SSE
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            follow_redirects=True,
-            headers={
-                "Accept": "application/json, text/event-stream"
-            }
-        )
-        self._tools_cache = None
-        self._server_type = None  # 'rest' or 'jsonrpc'
-    
-    async def _parse_sse_response(self, response: httpx.Response) -> Dict[str, Any]:
-        """
-        Parse Server-Sent Events (SSE) response from FastMCP.
-        
-        Args:
-            response: HTTP response object
-            
-        Returns:
-            Parsed JSON data from the SSE message
-        """
-        text = response.text
-        lines = text.strip().split('\n')
-        
-        # Look for data: line in SSE format
-        for line in lines:
-            if line.startswith('data: '):
-                data_str = line[6:]  # Remove 'data: ' prefix
-                return json.loads(data_str)
-        
-        # If no SSE format, try parsing as regular JSON
-        return response.json()
+        # The client is owned by the caller (the shared pool by default)
+        self.client = client if client is not None else get_mcp_client()
+        self._rest_urls = {method: f"{mcp_url}/{method}" for method in _REST_METHODS} if mcp_url else {}
+        self._server_type = self._type_cache.get(mcp_url)  # 'rest' or 'jsonrpc'
     
     def _format_helpx_results(self, data: Dict[str, Any]) -> str:
         """
@@ -69,140 +146,241 @@ class MCPSubAgent:
         if total == 0:
             return f"No Adobe HelpX documentation found for '{query}'. Try rephrasing your question."
         
-        output = [f"Found {total} Adobe HelpX articles about '{query}':\n"]
-        
-        for i, result in enumerate(results[:5], 1):  # Show top 5
-            title = result.get("title", "No title")
-            url = result.get("url", "")
-            score = result.get("score", 0.0)
-            snippet = result.get("snippet", "")
-            
-            output.append(f"\n{i}. **{title}**")
-            if url:
-                output.append(f"   🔗 {url}")
-            output.append(f"   📊 Relevance: {score:.2f}")
-            if snippet:
-                # Truncate snippet if too long
-                clean_snippet = snippet.strip()
-                if len(clean_snippet) > 200:
-                    clean_snippet = clean_snippet[:200] + "..."
-                output.append(f"   📝 {clean_snippet}")
-        
-        return "\n".join(output)
+        header = f"Found {total} Adobe HelpX articles about '{query}':\n"
+        blocks = (_format_helpx_entry(i, result) for i, result in enumerate(results[:5], 1))  # Show top 5
+        return "\n".join((header, *blocks))
     
     async def _detect_server_type(self) -> str:
         """
         Detect if the server is REST-style or JSON-RPC style.
         
+        A type confirmed by a probe is remembered per URL for the process;
+        inconclusive fallbacks are not, so they are re-probed next time.
+        
         Returns:
             'rest' or 'jsonrpc'
         """
         if self._server_type:
             return self._server_type
         
-        print(f"🔍 Detecting MCP server type at {self.mcp_url}...")
+        logger.debug("🔍 Detecting MCP server type at %s...", self.mcp_url)
         
         # Try JSON-RPC style first (FastMCP)
         try:
-            print(f"   Trying JSON-RPC format...")
-            response = await self.client.post(
-                self.mcp_url,
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "tools/list",
-                    "params": {},
-                    "id": 1
-                },
-                headers={"Content-Type": "application/json"}
-            )
-            print(f"   JSON-RPC response status: {response.status_code}")
+            logger.debug("   Trying JSON-RPC format...")
+            status_code, messages = await self._send_jsonrpc(_TOOLS_LIST_JSONRPC_BODY, check_status=False)
+            logger.debug("   JSON-RPC response status: %s", status_code)
             
-            if response.status_code == 200:
-                # Try parsing as SSE first
-                data = await self._parse_sse_response(response)
-                print(f"   JSON-RPC response keys: {list(data.keys())}")
+            if messages and isinstance(messages[0], dict):
+                data = messages[0]
+                logger.debug("   JSON-RPC response keys: %s", data.keys())
                 if "result" in data or "error" in data or "jsonrpc" in data:
                     self._server_type = 'jsonrpc'
-                    print(f"✅ Detected JSON-RPC MCP server at {self.mcp_url}")
+                    MCPSubAgent._type_cache[self.mcp_url] = 'jsonrpc'
+                    logger.info("✅ Detected JSON-RPC MCP server at %s", self.mcp_url)
                     return 'jsonrpc'
         except Exception as e:
-            print(f"   JSON-RPC detection failed: {e}")
+            logger.debug("   JSON-RPC detection failed: %s", e)
         
         # Try REST style
         try:
-            print(f"   Trying REST format...")
+            logger.debug("   Trying REST format...")
             response = await self.client.post(
-                f"{self.mcp_url}/tools/list",
-                json={"method": "tools/list"},
-                headers={"Content-Type": "application/json"}
+                self._rest_urls["tools/list"],
+                content=_STATIC_REST_BODIES["tools/list"],
+                headers=_JSON_HEADERS
             )
-            print(f"   REST response status: {response.status_code}")
+            logger.debug("   REST response status: %s", response.status_code)
             
             if response.status_code == 200:
-                data = response.json()
-                print(f"   REST response keys: {list(data.keys())}")
+                data = orjson.loads(response.content)
+                logger.debug("   REST response keys: %s", data.keys())
                 if "tools" in data or "result" in data:
                     self._server_type = 'rest'
-                    print(f"✅ Detected REST-style MCP server at {self.mcp_url}")
+                    MCPSubAgent._type_cache[self.mcp_url] = 'rest'
+                    logger.info("✅ Detected REST-style MCP server at %s", self.mcp_url)
                     return 'rest'
         except Exception as e:
-            print(f"   REST detection failed: {e}")
+            logger.debug("   REST detection failed: %s", e)
         
         # Default to JSON-RPC if URL ends with /mcp
         if self.mcp_url.endswith('/mcp'):
-            print(f"⚠️  Auto-detection inconclusive, defaulting to JSON-RPC (URL ends with /mcp)")
+            logger.warning("⚠️  Auto-detection inconclusive, defaulting to JSON-RPC (URL ends with /mcp)")
             self._server_type = 'jsonrpc'
             return 'jsonrpc'
         
         # Otherwise default to REST
-        print(f"⚠️  Auto-detection inconclusive, defaulting to REST")
+        logger.warning("⚠️  Auto-detection inconclusive, defaulting to REST")
         self._server_type = 'rest'
         return 'rest'
     
+    async def _request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]],
+        request_id: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Send an MCP request in the server's style.
+        
+        While the server type is unknown and the URL ends with /mcp, the real
+        request is sent as JSON-RPC and doubles as the detection probe; if the
+        reply is not JSON-RPC it is retried REST-style. The server is only
+        taken to be REST once that retry succeeds; otherwise it stays JSON-RPC
+        and the JSON-RPC failure is raised. Other URLs are probed with
+        `_detect_server_type` first.
+        
+        Args:
+            method: MCP method, e.g. "tools/list"
+            params: Method parameters (None for none)
+            request_id: JSON-RPC request id
+        
+        Returns:
+            Tuple of (server type, parsed response data)
+        """
+        server_type = self._server_type
+        if params is None and method == "tools/list" and request_id == 1:
+            jsonrpc_body = _TOOLS_LIST_JSONRPC_BODY
+        else:
+            jsonrpc_body = orjson.dumps({
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params or {},
+                "id": request_id
+            })
+        if server_type is None and self.mcp_url.endswith('/mcp'):
+            jsonrpc_error: Optional[Exception] = None
+            try:
+                _, messages = await self._send_jsonrpc(jsonrpc_body)
+            except (httpx.HTTPStatusError, orjson.JSONDecodeError) as e:
+                jsonrpc_error, messages = e, []
+            data = messages[0] if messages and isinstance(messages[0], dict) else {}
+            if "result" in data or "error" in data or "jsonrpc" in data:
+                self._server_type = 'jsonrpc'
+                MCPSubAgent._type_cache[self.mcp_url] = 'jsonrpc'
+                logger.info("✅ Detected JSON-RPC MCP server at %s", self.mcp_url)
+                return 'jsonrpc', data
+            
+            logger.debug("   JSON-RPC request not understood, retrying REST-style")
+            response = await self._post_rest(method, params)
+            if response.is_success:
+                self._server_type = 'rest'
+                logger.info("✅ Detected REST-style MCP server at %s", self.mcp_url)
+                return 'rest', orjson.loads(response.content)
+            # Neither style worked (e.g. a transient 5xx/429): don't settle on REST
+            self._server_type = 'jsonrpc'
+            if jsonrpc_error is not None:
+                raise jsonrpc_error
+            response.raise_for_status()
+        elif server_type is None:
+            server_type = await self._detect_server_type()
+        
+        if server_type == 'jsonrpc':
+            _, messages = await self._send_jsonrpc(jsonrpc_body)
+            return server_type, messages[0] if messages else {}
+        
+        response = await self._post_rest(method, params)
+        response.raise_for_status()
+        return server_type, orjson.loads(response.content)
+    
+    async def _post_rest(self, method: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        """POST an MCP request to the method's REST endpoint."""
+        if params is None and method in _STATIC_REST_BODIES:
+            rest_body = _STATIC_REST_BODIES[method]
+        else:
+            rest_body = orjson.dumps({"method": method, "params": params})
+        return await self.client.post(
+            self._rest_urls.get(method) or f"{self.mcp_url}/{method}",
+            content=rest_body,
+            headers=_JSON_HEADERS
+        )
+    
+    async def _send_jsonrpc(self, body: bytes, check_status: bool = True) -> Tuple[int, List[Any]]:
+        """
+        POST a JSON-RPC payload and decode the reply as it streams in.
+        
+        FastMCP answers with Server-Sent Events; every `data:` message is
+        decoded incrementally. Plain JSON replies yield a single message.
+        
+        Args:
+            body: Encoded JSON-RPC request object or batch array
+            check_status: Raise `httpx.HTTPStatusError` on an error status
+        
+        Returns:
+            Tuple of (HTTP status code, decoded messages); no messages are
+            decoded for a non-200 reply when `check_status` is False
+        """
+        async with self.client.stream(
+            "POST",
+            self.mcp_url,
+            content=body,
+            headers=_JSON_HEADERS
+        ) as response:
+            if not check_status and response.status_code != 200:
+                return response.status_code, []
+            if response.is_error:
+                # Read the body so error handlers can still log it
+                await response.aread()
+                response.raise_for_status()
+            
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                decoder = _SSEDecoder()
+                messages = []
+                async for chunk in response.aiter_bytes():
+                    messages.extend(orjson.loads(data) for data in decoder.feed(chunk))
+                messages.extend(orjson.loads(data) for data in decoder.close())
+                return response.status_code, messages
+            
+            body = await response.aread()
+            if body[:64].lstrip().startswith((b"data:", b"event:")):
+                # SSE sent without the text/event-stream content type
+                decoder = _SSEDecoder()
+                data = decoder.feed(body) + decoder.close()
+                return response.status_code, [orjson.loads(item) for item in data]
+            return response.status_code, [orjson.loads(body)] if body.strip() else []
+    
     async def list_tools(self) -> List[Dict[str, Any]]:
         """
         List available tools from the MCP server.
         
+        The list is cached per server URL for `settings.mcp_tools_cache_ttl`
+        seconds; an expired entry is returned once more while it is refreshed
+        in the background.
+        
         Returns:
             List of tool definitions
         """
         if not self.mcp_url:
             return []
         
+        cached = _tools_list_cache.get(self.mcp_url)
+        if cached is None:
+            return await self._fetch_tools()
+        
+        expires_at, tools = cached
+        if expires_at <= time.monotonic():
+            task = _tools_refresh_tasks.get(self.mcp_url)
+            if task is None or task.done():
+                task = asyncio.create_task(self._fetch_tools())
+                task.add_done_callback(self._on_refresh_done)
+                _tools_refresh_tasks[self.mcp_url] = task
+        return tools
+    
+    def _on_refresh_done(self, task: "asyncio.Task[List[Dict[str, Any]]]"):
+        """Forget a finished background refresh and log how it failed, if it did."""
+        if _tools_refresh_tasks.get(self.mcp_url) is task:
+            del _tools_refresh_tasks[self.mcp_url]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("❌ Background MCP tools refresh failed: %s", task.exception())
+    
+    async def _fetch_tools(self) -> List[Dict[str, Any]]:
+        """Fetch the tools list from the MCP server and cache it on success."""
         try:
-            server_type = await self._detect_server_type()
-            print(f"🔍 Listing tools from MCP server ({server_type}): {self.mcp_url}")
-            
-            if server_type == 'jsonrpc':
-                # JSON-RPC style (FastMCP)
-                response = await self.client.post(
-                    self.mcp_url,
-                    json={
-                        "jsonrpc": "2.0",
-                        "method": "tools/list",
-                        "params": {},
-                        "id": 1
-                    },
-                    headers={"Content-Type": "application/json"}
-                )
-            else:
-                # REST style
-                response = await self.client.post(
-                    f"{self.mcp_url}/tools/list",
-                    json={"method": "tools/list"},
-                    headers={"Content-Type": "application/json"}
-                )
-            
-            response.raise_for_status()
-            
-            # Parse response (SSE or JSON)
-            if server_type == 'jsonrpc':
-                data = await self._parse_sse_response(response)
-            else:
-                data = response.json()
+            logger.debug("🔍 Listing tools from MCP server: %s", self.mcp_url)
+            server_type, data = await self._request("tools/list", None, 1)
             
             # Debug logging
-            print(f"📦 MCP Response keys: {list(data.keys())}")
+            logger.debug("📦 MCP Response keys: %s", data.keys())
             
             # Handle different response formats
             if server_type == 'jsonrpc':
@@ -214,13 +392,13 @@ class MCPSubAgent:
                     elif isinstance(result, list):
                         tools = result
                     else:
-                        print(f"⚠️  Unexpected JSON-RPC result format: {result}")
+                        logger.warning("⚠️  Unexpected JSON-RPC result format: %s", result)
                         tools = []
                 elif "error" in data:
-                    print(f"❌ JSON-RPC error: {data['error']}")
+                    logger.error("❌ JSON-RPC error: %s", data['error'])
                     tools = []
                 else:
-                    print(f"⚠️  Unexpected JSON-RPC response: {data}")
+                    logger.warning("⚠️  Unexpected JSON-RPC response: %s", data)
                     tools = []
             else:
                 # REST format
@@ -231,18 +409,20 @@ class MCPSubAgent:
                 elif "result" in data and isinstance(data["result"], list):
                     tools = data["result"]
                 else:
-                    print(f"⚠️  Unexpected REST response format. Keys: {list(data.keys())}")
+                    logger.warning("⚠️  Unexpected REST response format. Keys: %s", list(data))
                     tools = []
             
-            self._tools_cache = tools
-            print(f"✅ Found {len(tools)} tools from MCP server:")
-            for tool in tools:
-                print(f"   - {tool.get('name', 'unnamed')}: {tool.get('description', 'no description')[:100]}")
-            return self._tools_cache
+            logger.info("✅ Found %d tools from MCP server", len(tools))
+            if logger.isEnabledFor(logging.DEBUG):
+                for tool in tools:
+                    logger.debug("   - %s: %.100s", tool.get('name', 'unnamed'), tool.get('description', 'no description'))
+            if settings.mcp_tools_cache_ttl > 0:
+                _tools_list_cache[self.mcp_url] = (
+                    time.monotonic() + settings.mcp_tools_cache_ttl, tools
+                )
+            return tools
         except Exception as e:
-            print(f"❌ Error listing MCP tools: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error listing MCP tools: %s", e)
             return []
     
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
@@ -260,112 +440,173 @@ class MCPSubAgent:
             return "Error: No MCP server URL configured"
         
         try:
-            server_type = await self._detect_server_type()
+            logger.debug(
+                "🔧 Calling MCP tool: %s | 📦 Arguments: %s | 🌐 MCP URL: %s",
+                tool_name, arguments, self.mcp_url
+            )
             
-            print(f"🔧 Calling MCP tool: {tool_name}")
-            print(f"📦 Arguments: {arguments}")
-            print(f"🌐 MCP URL: {self.mcp_url} ({server_type})")
+            server_type, data = await self._request(
+                "tools/call",
+                {"name": tool_name, "arguments": arguments},
+                2
+            )
             
-            if server_type == 'jsonrpc':
-                # JSON-RPC style (FastMCP)
-                payload = {
+            # Log the shape only; helpx payloads can run to megabytes
+            logger.debug(
+                "✅ MCP Response keys: %s",
+                list(data) if isinstance(data, dict) else type(data).__name__
+            )
+            
+            return self._extract_tool_result(server_type, data)
+            
+        except httpx.HTTPError as e:
+            error_msg = f"HTTP Error calling MCP tool '{tool_name}': {str(e)}"
+            logger.error("❌ %s", error_msg)
+            # Only decode the error body when it is actually going to be logged
+            if logger.isEnabledFor(logging.DEBUG) and getattr(e, 'response', None) is not None:
+                logger.debug("Response: %.500s", e.response.text)
+            return error_msg
+        except Exception as e:
+            error_msg = f"Error calling MCP tool '{tool_name}': {str(e)}"
+            logger.exception("❌ %s", error_msg)
+            return error_msg
+    
+    async def call_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Call several tools on the MCP server at once.
+        
+        JSON-RPC servers receive the calls as a single batch request. REST
+        servers have no batch endpoint, and servers on newer MCP revisions
+        reject batches, so those calls are made concurrently instead; a
+        rejected batch is remembered per URL and not retried.
+        
+        Args:
+            calls: (tool_name, arguments) pairs
+        
+        Returns:
+            Tool execution results as strings, in the order of `calls`
+        """
+        if not self.mcp_url:
+            return ["Error: No MCP server URL configured"] * len(calls)
+        
+        server_type = self._server_type
+        if server_type is None and not self.mcp_url.endswith('/mcp'):
+            server_type = await self._detect_server_type()
+        if server_type == 'rest' or len(calls) < 2 or self._batch_cache.get(self.mcp_url) is False:
+            return await self._call_tools_concurrently(calls)
+        
+        # An unknown /mcp server gets the batch straight away; a REST server
+        # refuses it and the fallback below detects the type
+        try:
+            logger.debug("🔧 Calling %d MCP tools in one batch: %s", len(calls), self.mcp_url)
+            status_code, messages = await self._send_jsonrpc(orjson.dumps([
+                {
                     "jsonrpc": "2.0",
                     "method": "tools/call",
                     "params": {
                         "name": tool_name,
                         "arguments": arguments
                     },
-                    "id": 2
+                    "id": request_id
                 }
-                response = await self.client.post(
-                    self.mcp_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-            else:
-                # REST style
-                payload = {
-                    "method": "tools/call",
-                    "params": {
-                        "name": tool_name,
-                        "arguments": arguments
-                    }
-                }
-                response = await self.client.post(
-                    f"{self.mcp_url}/tools/call",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-            
-            response.raise_for_status()
-            
-            # Parse response (SSE or JSON)
-            if server_type == 'jsonrpc':
-                data = await self._parse_sse_response(response)
-            else:
-                data = response.json()
-            
-            print(f"✅ MCP Response: {data}")
-            
-            # Extract result based on server type
-            if server_type == 'jsonrpc':
-                # JSON-RPC format: {"jsonrpc": "2.0", "result": {...}, "id": 2}
-                if "result" in data:
-                    result = data["result"]
-                    if isinstance(result, dict):
-                        # Check for nested 'content' field (FastMCP tool response format)
-                        if "content" in result:
-                            content = result["content"]
-                            if isinstance(content, list) and len(content) > 0:
-                                # Extract text from content array
-                                text = content[0].get("text", json.dumps(content, indent=2))
-                                
-                                # Try to parse as JSON for better formatting
-                                try:
-                                    parsed = json.loads(text)
-                                    # Format helpx results nicely
-                                    if isinstance(parsed, dict) and "results" in parsed:
-                                        return self._format_helpx_results(parsed)
-                                    return text
-                                except (json.JSONDecodeError, TypeError):
-                                    return text
-                            return str(content)
-                        # Check for nested 'result' field
-                        if "result" in result:
-                            return str(result["result"])
-                        # Return formatted dict
-                        return json.dumps(result, indent=2)
-                    return str(result)
-                elif "error" in data:
-                    error = data["error"]
-                    return f"MCP Error: {error.get('message', error)}"
-            else:
-                # REST format
-                if "result" in data:
-                    result = data["result"]
-                    if isinstance(result, dict):
-                        # If result is a dict, check for nested 'result' field first
-                        if "result" in result:
-                            return str(result["result"])
-                        # Otherwise return a formatted version
-                        return json.dumps(result, indent=2)
-                    return str(result)
-            
-            # If no 'result' field, return the whole response
-            return json.dumps(data, indent=2)
-            
+                for request_id, (tool_name, arguments) in enumerate(calls)
+            ]), check_status=False)
+        except orjson.JSONDecodeError:
+            status_code, messages = 200, []
         except httpx.HTTPError as e:
-            error_msg = f"HTTP Error calling MCP tool '{tool_name}': {str(e)}"
-            print(f"❌ {error_msg}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
-            return error_msg
+            error_msg = f"HTTP Error calling MCP tools: {str(e)}"
+            logger.error("❌ %s", error_msg)
+            return [error_msg] * len(calls)
         except Exception as e:
-            error_msg = f"Error calling MCP tool '{tool_name}': {str(e)}"
-            print(f"❌ {error_msg}")
-            import traceback
-            traceback.print_exc()
-            return error_msg
+            error_msg = f"Error calling MCP tools: {str(e)}"
+            logger.exception("❌ %s", error_msg)
+            return [error_msg] * len(calls)
+        
+        # Replies may come as one JSON array or as separate SSE messages; a
+        # server that rejects batches answers with a status or an id-less error
+        replies: Dict[Any, Dict[str, Any]] = {}
+        for message in messages:
+            for reply in message if isinstance(message, list) else [message]:
+                if isinstance(reply, dict) and reply.get("id") is not None:
+                    replies[reply["id"]] = reply
+        
+        if not replies:
+            # Keep retrying after transient failures; anything else is a refusal
+            if status_code < 500 and status_code != 429:
+                MCPSubAgent._batch_cache[self.mcp_url] = False
+            logger.info("↩️  MCP server at %s did not answer the batch (HTTP %s), calling tools one by one",
+                        self.mcp_url, status_code)
+            return await self._call_tools_concurrently(calls)
+        
+        if self._server_type is None:
+            self._server_type = 'jsonrpc'
+            MCPSubAgent._type_cache[self.mcp_url] = 'jsonrpc'
+            logger.info("✅ Detected JSON-RPC MCP server at %s", self.mcp_url)
+        MCPSubAgent._batch_cache[self.mcp_url] = True
+        
+        missing = [request_id for request_id in range(len(calls)) if request_id not in replies]
+        retried = dict(zip(missing, await self._call_tools_concurrently([calls[i] for i in missing])))
+        return [
+            self._extract_tool_result('jsonrpc', replies[request_id])
+            if request_id in replies
+            else retried[request_id]
+            for request_id in range(len(calls))
+        ]
+    
+    async def _call_tools_concurrently(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Make each call with its own request, all at once."""
+        return list(await asyncio.gather(
+            *(self.call_tool(tool_name, arguments) for tool_name, arguments in calls)
+        ))
+    
+    def _extract_tool_result(self, server_type: str, data: Dict[str, Any]) -> str:
+        """Turn a tools/call response into the text handed back to the agent."""
+        # Extract result based on server type
+        if server_type == 'jsonrpc':
+            # JSON-RPC format: {"jsonrpc": "2.0", "result": {...}, "id": 2}
+            if "result" in data:
+                result = data["result"]
+                if isinstance(result, dict):
+                    # Check for nested 'content' field (FastMCP tool response format)
+                    if "content" in result:
+                        content = result["content"]
+                        if isinstance(content, list) and len(content) > 0:
+                            # Extract text from content array
+                            text = content[0].get("text", orjson.dumps(content).decode())
+                            
+                            # Try to parse as JSON for better formatting
+                            try:
+                                parsed = orjson.loads(text)
+                                # Format helpx results nicely
+                                if isinstance(parsed, dict) and "results" in parsed:
+                                    return self._format_helpx_results(parsed)
+                                return text
+                            except (orjson.JSONDecodeError, TypeError):
+                                return text
+                        return str(content)
+                    # Check for nested 'result' field
+                    if "result" in result:
+                        return str(result["result"])
+                    # Return formatted dict
+                    return orjson.dumps(result).decode()
+                return str(result)
+            elif "error" in data:
+                error = data["error"]
+                return f"MCP Error: {error.get('message', error)}"
+        else:
+            # REST format
+            if "result" in data:
+                result = data["result"]
+                if isinstance(result, dict):
+                    # If result is a dict, check for nested 'result' field first
+                    if "result" in result:
+                        return str(result["result"])
+                    # Otherwise return a formatted version
+                    return orjson.dumps(result).decode()
+                return str(result)
+        
+        # If no 'result' field, return the whole response
+        return orjson.dumps(data).decode()
     
     async def get_resources(self) -> List[Dict[str, Any]]:
         """
@@ -379,15 +620,15 @@ class MCPSubAgent:
         
         try:
             response = await self.client.post(
-                f"{self.mcp_url}/resources/list",
-                json={"method": "resources/list"},
-                headers={"Content-Type": "application/json"}
+                self._rest_urls["resources/list"],
+                content=_STATIC_REST_BODIES["resources/list"],
+                headers=_JSON_HEADERS
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             return data.get("resources", [])
         except Exception as e:
-            print(f"Error listing MCP resources: {e}")
+            logger.error("Error listing MCP resources: %s", e)
             return []
     
     async def read_resource(self, resource_uri: str) -> str:
@@ -412,12 +653,12 @@ class MCPSubAgent:
             }
             
             response = await self.client.post(
-                f"{self.mcp_url}/resources/read",
-                json=payload,
-                headers={"Content-Type": "application/json"}
+                self._rest_urls["resources/read"],
+                content=orjson.dumps(payload),
+                headers=_JSON_HEADERS
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if "contents" in data:
                 contents = data["contents"]
@@ -425,70 +666,282 @@ class MCPSubAgent:
                     return contents[0].get("text", str(contents))
                 return str(contents)
             
-            return json.dumps(data, indent=2)
+            return orjson.dumps(data).decode()
             
         except Exception as e:
             return f"Error reading MCP resource '{resource_uri}': {str(e)}"
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Release the sub-agent; the injected client is left open for reuse."""
     
-    def __del__(self):
-        """Cleanup on deletion."""
-        try:
-            import asyncio
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(self.close())
-            else:
-                loop.run_until_complete(self.close())
-        except:
-            pass
+    async def __aenter__(self) -> "MCPSubAgent":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+# Long-lived event loop serving the sync tool path. Pooled connections belong
+# to the loop that opened them, so this loop keeps an AsyncClient of its own.
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_client: Optional[httpx.AsyncClient] = None
+_background_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop, starting its thread on first use."""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_background_loop.run_forever,
+                name="mcp-tool-loop",
+                daemon=True
+            ).start()
+    return _background_loop
+
+
+def _get_background_client() -> httpx.AsyncClient:
+    """Return the AsyncClient bound to the background loop (call from that loop)."""
+    global _background_client
+    if _background_client is None or _background_client.is_closed:
+        _background_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(connect=5.0, read=30.0, write=5.0, pool=1.0),
+            follow_redirects=True,
+            http2=settings.mcp_http2,
+            headers={
+                "Accept": "application/json, text/event-stream"
+            }
+        )
+    return _background_client
+
+
+async def close_background_loop():
+    """Close the background loop's client and stop its thread (application shutdown)."""
+    global _background_loop, _background_client
+    with _background_lock:
+        loop, _background_loop = _background_loop, None
+    if loop is None:
+        return
+    if _background_client is not None:
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(_background_client.aclose(), loop)
+        )
+        _background_client = None
+    loop.call_soon_threadsafe(loop.stop)
+
+
+@atexit.register
+def _close_background_client_at_exit():
+    """Close the background loop's client when the app shutdown hook didn't run.
+    
+    Covers scripts that use MCPToolWrapper's sync path outside the FastAPI app.
+    """
+    loop, client = _background_loop, _background_client
+    if loop is None or client is None or client.is_closed or not loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+    except Exception as e:
+        logger.debug("Could not close MCP background client at exit: %s", e)
+
+
+# Results of idempotent MCP tools, keyed by (url, tool, arguments) with a
+# per-tool TTL in seconds. Time, UUID and calculator calls are never cached.
+# Used from both the caller's loop and the background loop, hence the lock.
+_TOOL_RESULT_TTLS = {"helpx": 300, "get_adobe_region": 300, "weather": 60}
+_TOOL_RESULT_CACHE_SIZE = 256
+_ERROR_RESULT_PREFIXES = ("Error", "HTTP Error", "MCP Error", '{"error"')
+_tool_result_cache: OrderedDict = OrderedDict()
+_tool_result_lock = threading.Lock()
+
+
+# MCP tools whose answers don't depend on when they were asked; an agent
+# reply built from anything else must not be reused across requests
+_IDEMPOTENT_TOOLS = frozenset({"helpx", "get_adobe_region", "calculator"})
+
+
+def _split_tool_queries(tool_query: str) -> List[str]:
+    """Split a tool input into its independent requests, one per non-empty line."""
+    return [line.strip() for line in tool_query.splitlines() if line.strip()]
+
+
+def is_cacheable_tool_call(tool_query: str, result: str) -> bool:
+    """Whether an agent reply built from this MCP tool call may be cached."""
+    result = str(result)
+    # Batched calls return "query\nresult" blocks, so look at every line start
+    if result.startswith(_ERROR_RESULT_PREFIXES) or any(f"\n{prefix}" in result for prefix in _ERROR_RESULT_PREFIXES):
+        return False
+    # Queries that route to no tool get a fixed help message
+    for query in _split_tool_queries(tool_query) or [tool_query]:
+        tool_name = _detect_tool(query.lower())
+        if tool_name is not None and tool_name not in _IDEMPOTENT_TOOLS:
+            return False
+    return True
+
+
+def _tool_cache_key(mcp_url: str, tool_name: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, str, bytes]]:
+    """Return the result-cache key for a call, or None if the tool isn't cacheable."""
+    if tool_name not in _TOOL_RESULT_TTLS:
+        return None
+    return (mcp_url, tool_name, orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS))
+
+
+def _tool_cache_get(key: Tuple[str, str, bytes]) -> Optional[str]:
+    """Return a cached tool result if present and not expired."""
+    with _tool_result_lock:
+        entry = _tool_result_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del _tool_result_cache[key]
+            return None
+        _tool_result_cache.move_to_end(key)
+        return result
+
+
+def _tool_cache_set(key: Tuple[str, str, bytes], result: str):
+    """Store a successful tool result, evicting the least recently used entries."""
+    if result.startswith(_ERROR_RESULT_PREFIXES):
+        return
+    with _tool_result_lock:
+        _tool_result_cache[key] = (time.monotonic() + _TOOL_RESULT_TTLS[key[1]], result)
+        _tool_result_cache.move_to_end(key)
+        while len(_tool_result_cache) > _TOOL_RESULT_CACHE_SIZE:
+            _tool_result_cache.popitem(last=False)
+
+
+def _keyword_regex(keywords: List[str]) -> "re.Pattern[str]":
+    """Compile a plain substring alternation for the given keywords."""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
+# Keyword-based tool detection, checked in priority order (Adobe HelpX first
+# as it's most specific). Each pattern is one pass over the query.
+_ADOBE_PRODUCTS = [
+    'photoshop', 'illustrator', 'indesign', 'acrobat', 'premiere',
+    'after effects', 'aftereffects', 'lightroom', 'xd', 'substance',
+    'animate', 'audition', 'bridge', 'camera raw', 'experience manager',
+    'aem', 'target', 'analytics', 'marketo', 'sign', 'dimension',
+    'fresco', 'express', 'creative cloud', 'adobe'
+]
+_HELPX_KEYWORDS = [
+    'how to', 'how do i', 'crop', 'edit', 'create', 'export', 'import',
+    'save', 'open', 'layer', 'mask', 'brush', 'tool', 'effect',
+    'filter', 'adjustment', 'color', 'transform', 'resize', 'rotate'
+]
+_TOOL_PATTERNS = (
+    ("helpx", _keyword_regex(_ADOBE_PRODUCTS + _HELPX_KEYWORDS)),
+    ("calculator", _keyword_regex([
+        'calculate', 'calculator', 'add', 'subtract', 'multiply', 'divide',
+        '+', '-', '*', '/', 'plus', 'minus', 'times'
+    ])),
+    ("weather", _keyword_regex(['weather'])),
+    ("time", _keyword_regex(['time', 'clock'])),
+    ("uuid", _keyword_regex(['uuid', 'unique id', 'identifier'])),
+)
+_OPERATION_PATTERNS = (
+    ("add", _keyword_regex(['add', '+', 'plus'])),
+    ("subtract", _keyword_regex(['subtract', '-', 'minus'])),
+    ("multiply", _keyword_regex(['multiply', '*', 'times'])),
+    ("divide", _keyword_regex(['divide', '/'])),
+)
+_CITY_REGEX = _keyword_regex(['tokyo', 'london', 'new york', 'paris', 'sydney'])
+_REGION_HINT_REGEX = _keyword_regex(['us-east', 'us-west', 'eastus', 'westus'])
+_REGION_REGEX = re.compile(r'(us-east-\d|us-west-\d|eastus\d?|westus\d?)')
+
+
+# Pure arithmetic ("2 + 3 * (4 - 1)") is evaluated locally, skipping the
+# round-trip to the MCP calculator
+_ARITH_REGEX = re.compile(r"[\s\d+\-*/().]+")
+_ARITH_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_ARITH_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _eval_arithmetic(node: ast.AST) -> float:
+    """Evaluate a parsed expression made only of numbers and + - * /."""
+    if isinstance(node, ast.Expression):
+        return _eval_arithmetic(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITH_BINARY_OPS:
+        return _ARITH_BINARY_OPS[type(node.op)](_eval_arithmetic(node.left), _eval_arithmetic(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _ARITH_UNARY_OPS:
+        return _ARITH_UNARY_OPS[type(node.op)](_eval_arithmetic(node.operand))
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+def _calculate_locally(expression: str) -> Optional[str]:
+    """
+    Evaluate a plain arithmetic expression without calling the MCP server.
+    
+    Returns:
+        The formatted result, or None if the expression needs the MCP calculator
+    """
+    if not _ARITH_REGEX.fullmatch(expression):
+        return None
+    expression = expression.strip()
+    try:
+        result = _eval_arithmetic(ast.parse(expression, mode="eval"))
+        return f"{expression} = {result}"
+    except ZeroDivisionError:
+        return "Error: Division by zero"
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+
+def _detect_tool(query_lower: str) -> Optional[str]:
+    """Return the name of the first tool whose keywords appear in the query."""
+    for tool_name, pattern in _TOOL_PATTERNS:
+        if pattern.search(query_lower):
+            return tool_name
+    if 'adobe region' in query_lower or ('region' in query_lower and _REGION_HINT_REGEX.search(query_lower)):
+        return "get_adobe_region"
+    return None
 
 
 # Synchronous wrapper for LangChain tool compatibility
 class MCPToolWrapper:
     """Synchronous wrapper for MCP sub-agent for use with LangChain."""
     
-    def __init__(self, mcp_url: str):
+    def __init__(self, mcp_url: str, client: Optional[httpx.AsyncClient] = None):
         self.mcp_url = mcp_url
+        self.client = client or get_mcp_client()
+        # Long-lived sub-agents (created on first use) so the detected server
+        # type is kept between calls: one for the caller's event loop and one
+        # for the background loop of the sync path. Each is only touched from
+        # its own loop, so no lock is needed.
+        self._agent: Optional[MCPSubAgent] = None
+        self._background_agent: Optional[MCPSubAgent] = None
     
     def _call_async(self, coro):
-        """Helper to run async code in sync context using a thread."""
-        import asyncio
-        import threading
-        from concurrent.futures import Future
-        
-        # Create a future to get the result
-        future = Future()
-        
-        def run_in_thread():
-            # Create a new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(coro)
-                future.set_result(result)
-            except Exception as e:
-                future.set_exception(e)
-            finally:
-                loop.close()
-        
-        # Run in a separate thread
-        thread = threading.Thread(target=run_in_thread)
-        thread.start()
-        thread.join(timeout=30)  # 30 second timeout
-        
-        if thread.is_alive():
+        """Run a coroutine on the background loop and wait for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, _get_background_loop())
+        try:
+            # Safety net only; the client's own timeouts normally fire first
+            return future.result(timeout=30)
+        except TimeoutError:
+            future.cancel()
             raise TimeoutError("MCP tool call timed out after 30 seconds")
-        
-        return future.result()
     
     def call_mcp_tool(self, tool_query: str) -> str:
         """
         Call an MCP tool with a natural language query.
         
+        Synchronous entrypoint for LangChain's sync tool path; the call is
+        scheduled on the long-lived background event loop.
+        
         Args:
             tool_query: Natural language description of what to do
         
@@ -496,108 +949,172 @@ class MCPToolWrapper:
             Result from the MCP tool
         """
         try:
-            # Extract tool name and arguments from the query
-            query_lower = tool_query.lower()
-            
-            # Simple keyword-based tool detection
-            tool_name = None
-            arguments = {}
-            
-            # Adobe HelpX detection (check this first as it's most specific)
-            adobe_products = [
-                'photoshop', 'illustrator', 'indesign', 'acrobat', 'premiere', 
-                'after effects', 'aftereffects', 'lightroom', 'xd', 'substance',
-                'animate', 'audition', 'bridge', 'camera raw', 'experience manager',
-                'aem', 'target', 'analytics', 'marketo', 'sign', 'dimension',
-                'fresco', 'express', 'creative cloud', 'adobe'
-            ]
-            
-            helpx_keywords = [
-                'how to', 'how do i', 'crop', 'edit', 'create', 'export', 'import',
-                'save', 'open', 'layer', 'mask', 'brush', 'tool', 'effect',
-                'filter', 'adjustment', 'color', 'transform', 'resize', 'rotate'
-            ]
-            
-            is_adobe_query = any(product in query_lower for product in adobe_products)
-            is_helpx_query = any(keyword in query_lower for keyword in helpx_keywords)
-            
-            if is_adobe_query or is_helpx_query:
-                tool_name = "helpx"
-                # Pass the full query to helpx
-                arguments = {"query": tool_query, "top_k": 5}
-                print(f"🎯 Detected Adobe HelpX query: '{tool_query}'")
-            
-            # Calculator detection
-            elif any(word in query_lower for word in ['calculate', 'calculator', 'add', 'subtract', 'multiply', 'divide', '+', '-', '*', '/', 'plus', 'minus', 'times']):
-                tool_name = "calculator"
-                # Try to extract numbers and operation
-                if 'add' in query_lower or '+' in query_lower or 'plus' in query_lower:
-                    arguments = {"operation": "add", "query": tool_query}
-                elif 'subtract' in query_lower or '-' in query_lower or 'minus' in query_lower:
-                    arguments = {"operation": "subtract", "query": tool_query}
-                elif 'multiply' in query_lower or '*' in query_lower or 'times' in query_lower:
-                    arguments = {"operation": "multiply", "query": tool_query}
-                elif 'divide' in query_lower or '/' in query_lower:
-                    arguments = {"operation": "divide", "query": tool_query}
-                else:
-                    arguments = {"query": tool_query}
-            
-            # Weather detection
-            elif 'weather' in query_lower:
-                tool_name = "weather"
-                # Try to extract city name
-                for city in ['tokyo', 'london', 'new york', 'paris', 'sydney']:
-                    if city in query_lower:
-                        arguments = {"city": city.title()}
-                        break
-                if not arguments:
-                    arguments = {"query": tool_query}
+            return self._call_async(self._run_on_background_loop(tool_query))
+        except Exception as e:
+            error_msg = f"Error calling MCP tool: {str(e)}"
+            logger.error("❌ %s", error_msg)
+            return error_msg
+    
+    async def acall_mcp_tool(self, tool_query: str) -> str:
+        """
+        Call an MCP tool with a natural language query from async code.
+        
+        A query with several non-empty lines is treated as independent
+        requests, one per line, and sent together (see `acall_mcp_tools`).
+        
+        Args:
+            tool_query: Natural language description of what to do
+        
+        Returns:
+            Result from the MCP tool
+        """
+        if self._agent is None:
+            self._agent = MCPSubAgent(self.mcp_url, client=self.client)
+        return await self._run_query(tool_query, self._agent)
+    
+    async def _run_on_background_loop(self, tool_query: str) -> str:
+        """Run a tool call with the client that belongs to the background loop."""
+        if self._background_agent is None or self._background_agent.client.is_closed:
+            self._background_agent = MCPSubAgent(self.mcp_url, client=_get_background_client())
+        return await self._run_query(tool_query, self._background_agent)
+    
+    async def _run_query(self, tool_query: str, agent: MCPSubAgent) -> str:
+        """Run a single query, or batch a multi-line one and label each result."""
+        tool_queries = _split_tool_queries(tool_query)
+        if len(tool_queries) < 2:
+            return await self._run_mcp_tool(tool_query, agent)
+        results = await self._run_mcp_tools(tool_queries, agent)
+        return "\n\n".join(f"{query}\n{result}" for query, result in zip(tool_queries, results))
+    
+    async def acall_mcp_tools(self, tool_queries: List[str]) -> List[str]:
+        """
+        Call MCP tools for several natural language queries at once.
+        
+        Queries that map to a server tool are sent together through
+        `MCPSubAgent.call_tools` (one JSON-RPC batch request).
+        
+        Args:
+            tool_queries: Natural language descriptions of what to do
+        
+        Returns:
+            Results from the MCP tools, in the order of `tool_queries`
+        """
+        if self._agent is None:
+            self._agent = MCPSubAgent(self.mcp_url, client=self.client)
+        return await self._run_mcp_tools(tool_queries, self._agent)
+    
+    async def _run_mcp_tools(self, tool_queries: List[str], agent: MCPSubAgent) -> List[str]:
+        """Route several queries and call their tools in one batch through the given sub-agent."""
+        results: List[Optional[str]] = []
+        calls: List[Tuple[str, Dict[str, Any]]] = []
+        cache_keys: List[Optional[Tuple[str, str, bytes]]] = []
+        pending: List[int] = []
+        for tool_query in tool_queries:
+            tool_name, arguments, result = self._route_query(tool_query)
+            if tool_name is not None:
+                cache_key = _tool_cache_key(self.mcp_url, tool_name, arguments)
+                result = _tool_cache_get(cache_key) if cache_key is not None else None
+                if result is None:
+                    pending.append(len(results))
+                    calls.append((tool_name, arguments))
+                    cache_keys.append(cache_key)
+            results.append(result)
+        
+        if calls:
+            try:
+                call_results = await agent.call_tools(calls)
+                for index, cache_key, result in zip(pending, cache_keys, call_results):
+                    results[index] = result
+                    if cache_key is not None:
+                        _tool_cache_set(cache_key, result)
+            except Exception as e:
+                error_msg = f"Error calling MCP tools: {str(e)}"
+                logger.exception("❌ %s", error_msg)
+                for index in pending:
+                    results[index] = error_msg
+        return results
+    
+    def _route_query(self, tool_query: str) -> Tuple[Optional[str], Dict[str, Any], Optional[str]]:
+        """
+        Pick the MCP tool and arguments for a natural language query.
+        
+        Returns:
+            (tool_name, arguments, None) for a server call, or
+            (None, {}, result) when the query is answered without one
+        """
+        # Extract tool name and arguments from the query
+        query_lower = tool_query.lower()
+        
+        # Simple keyword-based tool detection
+        tool_name = _detect_tool(query_lower)
+        arguments = {}
+        
+        if tool_name == "helpx":
+            # Pass the full query to helpx
+            arguments = {"query": tool_query, "top_k": 5}
+            logger.debug("🎯 Detected Adobe HelpX query: '%s'", tool_query)
+        
+        elif tool_name == "calculator":
+            local_result = _calculate_locally(tool_query)
+            if local_result is not None:
+                logger.debug("🧮 Calculated locally: %s", local_result)
+                return None, {}, local_result
             
-            # Time detection
-            elif 'time' in query_lower or 'clock' in query_lower:
-                tool_name = "time"
+            # Try to extract the operation
+            arguments = {"query": tool_query}
+            for operation, pattern in _OPERATION_PATTERNS:
+                if pattern.search(query_lower):
+                    arguments = {"operation": operation, "query": tool_query}
+                    break
+        
+        elif tool_name == "weather":
+            # Try to extract city name
+            city_match = _CITY_REGEX.search(query_lower)
+            if city_match:
+                arguments = {"city": city_match.group(0).title()}
+            else:
                 arguments = {"query": tool_query}
+        
+        elif tool_name == "time":
+            arguments = {"query": tool_query}
+        
+        elif tool_name == "get_adobe_region":
+            # Extract region from query
+            region_match = _REGION_REGEX.search(query_lower)
+            if region_match:
+                arguments = {"cloud_region": region_match.group(1)}
+            else:
+                arguments = {"query": tool_query}
+        
+        if not tool_name:
+            return None, {}, f"Could not determine which tool to use from query: {tool_query}. Available tools: helpx (Adobe product help), calculator, weather, time, uuid, get_adobe_region"
+        
+        logger.debug("🎯 Detected tool: %s with arguments: %s", tool_name, arguments)
+        return tool_name, arguments, None
+    
+    async def _run_mcp_tool(self, tool_query: str, agent: MCPSubAgent) -> str:
+        """Route the query to an MCP tool and call it through the given sub-agent."""
+        try:
+            tool_name, arguments, result = self._route_query(tool_query)
+            if tool_name is None:
+                return result
             
-            # UUID detection
-            elif 'uuid' in query_lower or 'unique id' in query_lower or 'identifier' in query_lower:
-                tool_name = "uuid"
-                arguments = {}
-            
-            # Adobe region detection
-            elif 'adobe region' in query_lower or ('region' in query_lower and any(r in query_lower for r in ['us-east', 'us-west', 'eastus', 'westus'])):
-                tool_name = "get_adobe_region"
-                # Extract region from query
-                import re
-                region_match = re.search(r'(us-east-\d|us-west-\d|eastus\d?|westus\d?)', query_lower)
-                if region_match:
-                    arguments = {"cloud_region": region_match.group(1)}
-                else:
-                    arguments = {"query": tool_query}
-            
-            if not tool_name:
-                return f"Could not determine which tool to use from query: {tool_query}. Available tools: helpx (Adobe product help), calculator, weather, time, uuid, get_adobe_region"
-            
-            print(f"🎯 Detected tool: {tool_name} with arguments: {arguments}")
-            
-            # Create a new MCP agent for each call to avoid connection issues
-            async def make_call():
-                agent = MCPSubAgent(self.mcp_url)
-                try:
-                    result = await agent.call_tool(tool_name, arguments)
-                    return result
-                finally:
-                    await agent.close()
+            cache_key = _tool_cache_key(self.mcp_url, tool_name, arguments)
+            if cache_key is not None:
+                cached = _tool_cache_get(cache_key)
+                if cached is not None:
+                    logger.debug("⚡ MCP tool cache hit: %s", tool_name)
+                    return cached
             
-            # Call the async method in a separate thread
-            result = self._call_async(make_call())
+            result = await agent.call_tool(tool_name, arguments)
+            if cache_key is not None:
+                _tool_cache_set(cache_key, result)
             
-            print(f"📤 MCP Result: {result[:500]}..." if len(result) > 500 else f"📤 MCP Result: {result}")
+            logger.debug("📤 MCP Result: %.500s", result)
             
             return result
             
         except Exception as e:
             error_msg = f"Error calling MCP tool: {str(e)}"
-            print(f"❌ {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ %s", error_msg)
             return error_msg
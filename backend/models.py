@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import Optional, List, Literal
 from datetime import datetime
 
 
@@ -12,12 +12,16 @@ class UserCreate(BaseModel):
 
 class UserLogin(BaseModel):
     """User login model."""
+    model_config = ConfigDict(frozen=True)
+    
     email: EmailStr
     password: str
 
 
 class User(BaseModel):
     """User model."""
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     email: EmailStr
     full_name: Optional[str] = None
@@ -38,12 +42,16 @@ class TokenData(BaseModel):
 
 class ChatMessage(BaseModel):
     """Chat message model."""
-    role: str = Field(..., pattern="^(user|assistant|system)$")
+    model_config = ConfigDict(frozen=True)
+    
+    role: Literal["user", "assistant", "system"]
     content: str
 
 
 class ChatRequest(BaseModel):
     """Chat request model."""
+    model_config = ConfigDict(frozen=True)
+    
     message: str
     conversation_history: Optional[List[ChatMessage]] = []
     model: Optional[str] = None  # Optional model selection
@@ -5,4 +5,4 @@
 # python -m alembic upgrade head
 
 # Start the FastAPI server
-exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8000}
+exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8000} --loop uvloop --http httptools
@@ -290,7 +290,7 @@ export default function Chat() {
                 </div>
               </div>
             ))}
-            {isLoading && (
+            {isLoading && messages[messages.length - 1]?.role !== 'assistant' && (
               <div className="message assistant">
                 <div className="message-avatar">🤖</div>
                 <div className="message-content">
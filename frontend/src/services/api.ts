@@ -67,6 +67,62 @@ class ApiService {
     return response.data;
   }
 
+  // Streams the reply from /chat/stream (Server-Sent Events), calling
+  // onChunk with each piece of the answer as it arrives. Uses fetch because
+  // axios cannot read a response body incrementally in the browser.
+  async streamMessage(
+    message: string,
+    conversationHistory: any[],
+    model: string | undefined,
+    onChunk: (chunk: string) => void
+  ) {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${API_URL}/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify({
+        message,
+        conversation_history: conversationHistory,
+        model,
+      }),
+    });
+
+    if (response.status === 401) {
+      localStorage.removeItem('token');
+      window.location.href = '/login';
+    }
+    if (!response.ok || !response.body) {
+      // Same shape as an axios error so callers can read response.data.detail
+      const data = await response.json().catch(() => ({}));
+      throw { response: { status: response.status, data } };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop() ?? '';
+      for (const event of events) {
+        if (event.startsWith('event: error\n')) {
+          // Same shape as an axios error so callers can read response.data.detail
+          const data = JSON.parse(event.slice(event.indexOf('data: ') + 'data: '.length));
+          throw { response: { status: response.status, data } };
+        }
+        if (!event.startsWith('data: ')) continue;
+        const data = event.slice('data: '.length);
+        if (data === '[DONE]') return;
+        onChunk(JSON.parse(data).content);
+      }
+    }
+  }
+
   async getAgentInfo() {
     const response = await this.api.get('/agent/info');
     return response.data;
@@ -46,19 +46,26 @@ export const useChatStore = create<ChatState>((set, get) => ({
       const modelToUse = model || get().selectedModel || undefined;
       console.log('📤 Sending message with model:', modelToUse);
 
-      // Send to API
-      const response = await apiService.sendMessage(content, conversationHistory, modelToUse);
-
-      // Add assistant response
-      const assistantMessage: Message = {
-        role: 'assistant',
-        content: response.response,
-        timestamp: new Date(),
-      };
-      set((state) => ({
-        messages: [...state.messages, assistantMessage],
-        isLoading: false,
-      }));
+      // Stream the reply into a new assistant message as chunks arrive
+      let started = false;
+      await apiService.streamMessage(content, conversationHistory, modelToUse, (chunk) => {
+        set((state) => {
+          if (!started) {
+            started = true;
+            const assistantMessage: Message = {
+              role: 'assistant',
+              content: chunk,
+              timestamp: new Date(),
+            };
+            return { messages: [...state.messages, assistantMessage] };
+          }
+          const messages = state.messages.slice();
+          const last = messages[messages.length - 1];
+          messages[messages.length - 1] = { ...last, content: last.content + chunk };
+          return { messages };
+        });
+      });
+      set({ isLoading: false });
     } catch (error: any) {
       set({
         error: error.response?.data?.detail || 'Failed to send message',
@@ -2,26 +2,119 @@
 Simple MCP Test Server for MooAgent
 A basic MCP server with example tools for testing
 """
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Literal, Optional, Union
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import operator
+import os
+import msgspec
+import orjson
+import uuid
 import uvicorn
 
-app = FastAPI(title="MCP Test Server", version="1.0.0")
+# Interactive API docs are only served when DEBUG is set
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
 
-# Enable CORS for local testing
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+app = FastAPI(
+    title="MCP Test Server",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if DEBUG else None,
+    redoc_url="/redoc" if DEBUG else None,
+    openapi_url="/openapi.json" if DEBUG else None
 )
 
-class MCPRequest(BaseModel):
+
+class OpenCORSMiddleware:
+    """
+    Allow any origin for local testing.
+    
+    A bare ASGI middleware that answers preflights and tags every response,
+    without CORSMiddleware's per-request origin matching.
+    """
+    
+    _ALLOW_ORIGIN = (b"access-control-allow-origin", b"*")
+    _PREFLIGHT_HEADERS = [
+        _ALLOW_ORIGIN,
+        (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+        (b"access-control-max-age", b"600"),
+        (b"content-length", b"0"),
+    ]
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS":
+            headers = dict(scope["headers"])
+            if b"access-control-request-method" in headers:
+                response_headers = list(self._PREFLIGHT_HEADERS)
+                requested_headers = headers.get(b"access-control-request-headers")
+                if requested_headers:
+                    response_headers.append((b"access-control-allow-headers", requested_headers))
+                await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), self._ALLOW_ORIGIN]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+
+# Enable CORS for local testing
+app.add_middleware(OpenCORSMiddleware)
+
+class MCPRequest(msgspec.Struct):
     method: str
-    params: Optional[Dict[str, Any]] = {}
+    params: Dict[str, Any] = msgspec.field(default_factory=dict)
+    # JSON-RPC 2.0 envelope fields (used by /mcp); a request without an id is a notification
+    jsonrpc: Optional[str] = None
+    id: Union[int, str, None, msgspec.UnsetType] = msgspec.UNSET
+
+
+_mcp_request_decoder = msgspec.json.Decoder(MCPRequest)
+# /mcp takes a single JSON-RPC request or a batch array
+_jsonrpc_decoder = msgspec.json.Decoder(Union[MCPRequest, List[MCPRequest]])
+
+# JSON-RPC 2.0 error codes
+JSONRPC_PARSE_ERROR = -32700
+JSONRPC_INVALID_REQUEST = -32600
+JSONRPC_METHOD_NOT_FOUND = -32601
+JSONRPC_INVALID_PARAMS = -32602
+
+
+async def parse_mcp_request(request: Request) -> MCPRequest:
+    """Decode the request body straight into an MCPRequest (unknown fields are ignored)."""
+    try:
+        return _mcp_request_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# Typed arguments for the per-tool endpoints (/tools/call/<tool>)
+class CalculatorArgs(BaseModel):
+    operation: Literal["add", "subtract", "multiply", "divide"]
+    a: float
+    b: float
+
+
+class WeatherArgs(BaseModel):
+    city: str = "Unknown"
+
+
+class TimeArgs(BaseModel):
+    timezone: str = "UTC"
 
 
 # Define example tools
@@ -74,44 +167,109 @@ TOOLS = [
 ]
 
 
+RESOURCES = [
+    {
+        "uri": "docs://readme",
+        "name": "README",
+        "description": "MCP Test Server documentation",
+        "mimeType": "text/markdown"
+    }
+]
+
+README_CONTENT = """# MCP Test Server
+
+This is a simple MCP server for testing MooAgent.
+
+## Available Tools
+
+1. **calculator** - Perform basic math operations
+2. **weather** - Get weather information (simulated)
+3. **time** - Get current time in any timezone
+4. **uuid** - Generate random UUIDs
+
+## Usage
+
+Ask MooAgent to use these tools:
+- "What's 15 plus 27?"
+- "What's the weather in Tokyo?"
+- "What time is it in New York?"
+- "Generate a UUID for me"
+"""
+
+# Static responses never change, so they're encoded once at startup
+_ROOT_BODY = orjson.dumps({
+    "name": "MCP Test Server",
+    "version": "1.0.0",
+    "description": "A simple MCP server for testing MooAgent",
+    "endpoints": [
+        "/tools/list",
+        "/tools/call",
+        "/tools/call/calculator",
+        "/tools/call/weather",
+        "/tools/call/time",
+        "/tools/call/uuid",
+        "/resources/list",
+        "/resources/read",
+        "/mcp"
+    ]
+})
+_TOOLS_BODY = orjson.dumps({"tools": TOOLS})
+_RESOURCES_BODY = orjson.dumps({"resources": RESOURCES})
+_README_BODY = orjson.dumps({
+    "contents": [
+        {
+            "uri": "docs://readme",
+            "mimeType": "text/markdown",
+            "text": README_CONTENT
+        }
+    ]
+})
+
+
 @app.get("/")
-def root():
+async def root():
     """Root endpoint."""
-    return {
-        "name": "MCP Test Server",
-        "version": "1.0.0",
-        "description": "A simple MCP server for testing MooAgent",
-        "endpoints": [
-            "/tools/list",
-            "/tools/call",
-            "/resources/list",
-            "/resources/read"
-        ]
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.post("/tools/list")
-def list_tools(request: Optional[MCPRequest] = None):
+async def list_tools():
     """List all available tools."""
-    return {"tools": TOOLS}
+    return tools_list_response({})
 
 
 @app.post("/tools/call")
-def call_tool(request: MCPRequest):
+async def call_tool(request: MCPRequest = Depends(parse_mcp_request)):
     """Call a specific tool."""
-    tool_name = request.params.get("name")
-    arguments = request.params.get("arguments", {})
+    return tools_call_response(request.params)
+
+
+def tools_list_response(params: Dict[str, Any]) -> Response:
+    """Response for the tools/list method."""
+    return Response(content=_TOOLS_BODY, media_type="application/json")
+
+
+def tools_call_response(params: Dict[str, Any]) -> Response:
+    """Response for the tools/call method."""
+    tool_name = params.get("name")
+    arguments = params.get("arguments", {})
+    if not isinstance(arguments, dict):
+        raise HTTPException(status_code=422, detail="Tool arguments must be an object")
     
-    if tool_name == "calculator":
-        return handle_calculator(arguments)
-    elif tool_name == "weather":
-        return handle_weather(arguments)
-    elif tool_name == "time":
-        return handle_time(arguments)
-    elif tool_name == "uuid":
-        return handle_uuid(arguments)
-    else:
+    handler = TOOL_HANDLERS.get(tool_name) if isinstance(tool_name, str) else None
+    if handler is None:
         raise HTTPException(status_code=404, detail=f"Tool '{tool_name}' not found")
+    result = handler(arguments)
+    # Hand FastAPI a finished response so it skips jsonable_encoder
+    return result if isinstance(result, Response) else ORJSONResponse(result)
+
+
+CALCULATOR_OPERATIONS: Dict[str, Callable[[float, float], float]] = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+}
 
 
 def handle_calculator(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -124,45 +282,39 @@ def handle_calculator(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "Missing required parameters: operation, a, b"}
     
     try:
-        a = float(a)
-        b = float(b)
-        
-        if operation == "add":
-            result = a + b
-        elif operation == "subtract":
-            result = a - b
-        elif operation == "multiply":
-            result = a * b
-        elif operation == "divide":
-            if b == 0:
-                return {"error": "Division by zero"}
-            result = a / b
-        else:
-            return {"error": f"Unknown operation: {operation}"}
-        
-        return {
-            "result": f"{a} {operation} {b} = {result}",
-            "value": result
-        }
+        return calculate(operation, float(a), float(b))
     except Exception as e:
         return {"error": str(e)}
 
 
-def handle_weather(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle weather tool (simulated data)."""
-    city = args.get("city", "Unknown")
+def calculate(operation: str, a: float, b: float) -> Dict[str, Any]:
+    """Apply a calculator operation to two numbers."""
+    op = CALCULATOR_OPERATIONS.get(operation)
+    if op is None:
+        return {"error": f"Unknown operation: {operation}"}
+    if op is operator.truediv and b == 0:
+        return {"error": "Division by zero"}
+    result = op(a, b)
     
-    # Simulated weather data
-    weather_data = {
-        "Tokyo": {"temp": 18, "condition": "Sunny", "humidity": 65},
-        "London": {"temp": 12, "condition": "Cloudy", "humidity": 80},
-        "New York": {"temp": 15, "condition": "Rainy", "humidity": 75},
-        "Paris": {"temp": 14, "condition": "Partly Cloudy", "humidity": 70},
-        "Sydney": {"temp": 22, "condition": "Clear", "humidity": 60},
+    return {
+        "result": f"{a} {operation} {b} = {result}",
+        "value": result
     }
-    
-    data = weather_data.get(city, {"temp": 20, "condition": "Clear", "humidity": 50})
-    
+
+
+# Simulated weather data
+WEATHER_DATA = {
+    "Tokyo": {"temp": 18, "condition": "Sunny", "humidity": 65},
+    "London": {"temp": 12, "condition": "Cloudy", "humidity": 80},
+    "New York": {"temp": 15, "condition": "Rainy", "humidity": 75},
+    "Paris": {"temp": 14, "condition": "Partly Cloudy", "humidity": 70},
+    "Sydney": {"temp": 22, "condition": "Clear", "humidity": 60},
+}
+DEFAULT_WEATHER = {"temp": 20, "condition": "Clear", "humidity": 50}
+
+
+def _weather_payload(city: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the weather tool result for a city."""
     return {
         "result": f"Weather in {city}: {data['condition']}, {data['temp']}°C, Humidity: {data['humidity']}%",
         "city": city,
@@ -172,20 +324,50 @@ def handle_weather(args: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# Reports for the known cities are encoded once at startup
+_WEATHER_BODIES = {city: orjson.dumps(_weather_payload(city, data)) for city, data in WEATHER_DATA.items()}
+
+
+def handle_weather(args: Dict[str, Any]) -> Response:
+    """Handle weather tool (simulated data)."""
+    return weather_report(args.get("city", "Unknown"))
+
+
+def weather_report(city: str) -> Response:
+    """Return the simulated weather report for a city."""
+    body = _WEATHER_BODIES.get(city)
+    if body is None:
+        body = orjson.dumps(_weather_payload(city, DEFAULT_WEATHER))
+    return Response(content=body, media_type="application/json")
+
+
+@lru_cache(maxsize=128)
+def _get_timezone(name: str) -> tzinfo:
+    """Resolve and memoize a timezone by name."""
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=256)
+def _format_time_result(timezone: str, epoch_second: int) -> str:
+    """Format the time tool's message; requests within the same second share it."""
+    current_time = datetime.fromtimestamp(epoch_second, _get_timezone(timezone))
+    return f"Current time in {timezone}: {current_time.strftime('%Y-%m-%d %H:%M:%S %Z')}"
+
+
 def handle_time(args: Dict[str, Any]) -> Dict[str, Any]:
     """Handle time tool."""
-    from datetime import datetime
-    import pytz
-    
-    timezone = args.get("timezone", "UTC")
-    
+    return time_in_zone(args.get("timezone", "UTC"))
+
+
+def time_in_zone(timezone: str) -> Dict[str, Any]:
+    """Report the current time in the named timezone."""
     try:
-        tz = pytz.timezone(timezone)
+        tz = _get_timezone(timezone)
         current_time = datetime.now(tz)
         return {
-            "result": f"Current time in {timezone}: {current_time.strftime('%Y-%m-%d %H:%M:%S %Z')}",
+            "result": _format_time_result(timezone, int(current_time.timestamp())),
             "timezone": timezone,
-            "timestamp": current_time.isoformat()
+            "timestamp": current_time  # orjson writes ISO 8601 itself
         }
     except Exception as e:
         return {"error": f"Invalid timezone: {timezone}"}
@@ -193,7 +375,6 @@ def handle_time(args: Dict[str, Any]) -> Dict[str, Any]:
 
 def handle_uuid(args: Dict[str, Any]) -> Dict[str, Any]:
     """Handle UUID generation."""
-    import uuid
     generated_uuid = str(uuid.uuid4())
     return {
         "result": f"Generated UUID: {generated_uuid}",
@@ -201,57 +382,125 @@ def handle_uuid(args: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# Tool name -> handler, used by call_tool for dispatch
+TOOL_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Union[Dict[str, Any], Response]]] = {
+    "calculator": handle_calculator,
+    "weather": handle_weather,
+    "time": handle_time,
+    "uuid": handle_uuid,
+}
+
+
+@app.post("/tools/call/calculator")
+async def call_calculator(args: CalculatorArgs):
+    """Call the calculator with validated arguments."""
+    return ORJSONResponse(calculate(args.operation, args.a, args.b))
+
+
+@app.post("/tools/call/weather")
+async def call_weather(args: WeatherArgs):
+    """Call the weather tool with validated arguments."""
+    return weather_report(args.city)
+
+
+@app.post("/tools/call/time")
+async def call_time(args: TimeArgs):
+    """Call the time tool with validated arguments."""
+    return ORJSONResponse(time_in_zone(args.timezone))
+
+
+@app.post("/tools/call/uuid")
+async def call_uuid():
+    """Generate a UUID."""
+    return ORJSONResponse(handle_uuid({}))
+
+
 @app.post("/resources/list")
-def list_resources(request: Optional[MCPRequest] = None):
+async def list_resources():
     """List available resources."""
-    return {
-        "resources": [
-            {
-                "uri": "docs://readme",
-                "name": "README",
-                "description": "MCP Test Server documentation",
-                "mimeType": "text/markdown"
-            }
-        ]
-    }
+    return resources_list_response({})
 
 
 @app.post("/resources/read")
-def read_resource(request: MCPRequest):
+async def read_resource(request: MCPRequest = Depends(parse_mcp_request)):
     """Read a specific resource."""
-    uri = request.params.get("uri")
+    return resources_read_response(request.params)
+
+
+def resources_list_response(params: Dict[str, Any]) -> Response:
+    """Response for the resources/list method."""
+    return Response(content=_RESOURCES_BODY, media_type="application/json")
+
+
+def resources_read_response(params: Dict[str, Any]) -> Response:
+    """Response for the resources/read method."""
+    uri = params.get("uri")
     
     if uri == "docs://readme":
-        content = """# MCP Test Server
+        return Response(content=_README_BODY, media_type="application/json")
+    
+    raise HTTPException(status_code=404, detail=f"Resource '{uri}' not found")
 
-This is a simple MCP server for testing MooAgent.
 
-## Available Tools
+# MCP method -> response builder, used by the single /mcp endpoint
+METHOD_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Response]] = {
+    "tools/list": tools_list_response,
+    "tools/call": tools_call_response,
+    "resources/list": resources_list_response,
+    "resources/read": resources_read_response,
+}
 
-1. **calculator** - Perform basic math operations
-2. **weather** - Get weather information (simulated)
-3. **time** - Get current time in any timezone
-4. **uuid** - Generate random UUIDs
 
-## Usage
+def _jsonrpc_error(request_id: bytes, code: int, message: str) -> bytes:
+    """Encode a JSON-RPC error reply; request_id is already JSON-encoded."""
+    error = orjson.dumps({"code": code, "message": message})
+    return b'{"jsonrpc":"2.0","id":' + request_id + b',"error":' + error + b'}'
 
-Ask MooAgent to use these tools:
-- "What's 15 plus 27?"
-- "What's the weather in Tokyo?"
-- "What time is it in New York?"
-- "Generate a UUID for me"
-"""
-        return {
-            "contents": [
-                {
-                    "uri": uri,
-                    "mimeType": "text/markdown",
-                    "text": content
-                }
-            ]
-        }
+
+def jsonrpc_reply(request: MCPRequest) -> bytes:
+    """Run one JSON-RPC request and encode its reply."""
+    request_id = orjson.dumps(None if request.id is msgspec.UNSET else request.id)
+    handler = METHOD_HANDLERS.get(request.method)
+    if handler is None:
+        return _jsonrpc_error(request_id, JSONRPC_METHOD_NOT_FOUND, f"Method '{request.method}' not found")
+    try:
+        response = handler(request.params)
+    except HTTPException as e:
+        return _jsonrpc_error(request_id, JSONRPC_INVALID_PARAMS, e.detail)
+    except (TypeError, ValueError, AttributeError) as e:
+        # Malformed params must not take the rest of a batch down with them
+        return _jsonrpc_error(request_id, JSONRPC_INVALID_PARAMS, f"Invalid params: {e}")
+    # Handlers return finished responses, so splice their bytes in as the result
+    return b'{"jsonrpc":"2.0","id":' + request_id + b',"result":' + response.body + b'}'
+
+
+@app.post("/mcp")
+async def mcp(request: Request):
+    """Handle JSON-RPC 2.0 MCP calls (single or batch), dispatching on each request's method."""
+    try:
+        payload = _jsonrpc_decoder.decode(await request.body())
+    except msgspec.ValidationError as e:
+        body = _jsonrpc_error(b"null", JSONRPC_INVALID_REQUEST, str(e))
+        return Response(content=body, media_type="application/json")
+    except msgspec.DecodeError as e:
+        body = _jsonrpc_error(b"null", JSONRPC_PARSE_ERROR, str(e))
+        return Response(content=body, media_type="application/json")
     
-    raise HTTPException(status_code=404, detail=f"Resource '{uri}' not found")
+    if not isinstance(payload, list):
+        body = jsonrpc_reply(payload)
+        if payload.id is msgspec.UNSET:
+            return Response(status_code=202)
+        return Response(content=body, media_type="application/json")
+    
+    if not payload:
+        body = _jsonrpc_error(b"null", JSONRPC_INVALID_REQUEST, "Empty batch")
+        return Response(content=body, media_type="application/json")
+    # Notifications run but get no entry in the batch reply
+    replies = [jsonrpc_reply(item) for item in payload]
+    replies = [reply for item, reply in zip(payload, replies) if item.id is not msgspec.UNSET]
+    if not replies:
+        return Response(status_code=202)
+    return Response(content=b"[" + b",".join(replies) + b"]", media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -262,9 +511,23 @@ if __name__ == "__main__":
     print("   MCP_SERVER_URL=http://localhost:3001")
     print("\n⏹️  Press Ctrl+C to stop\n")
     
+    # uvloop and httptools come with uvicorn[standard]; uvloop isn't available on Windows
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    
+    # WORKERS > 1 spreads requests across processes (uvicorn needs the import string for that)
+    workers = int(os.getenv("WORKERS", "1"))
+    
     uvicorn.run(
-        app,
+        "mcp_test_server:app" if workers > 1 else app,
+        workers=workers,
         host="0.0.0.0",
         port=3001,
-        log_level="info"
+        loop=loop,
+        http="httptools",
+        log_level="warning",
+        access_log=False
     )